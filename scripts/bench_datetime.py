@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Callable, List
+
+import numpy as np
+
+from vnpy_xex.timestamp import CHINA_TZ, EPOCH, DatetimeConverter, generate_datetimes
+
+# 推送时间戳：每秒20条，模拟同一秒内多条推送
+START: int = 1685411494859
+MESSAGES: List[int] = [START + i * 50 for i in range(200_000)]
+
+# K线分页：每页1000根1分钟K线
+PAGE: np.ndarray = np.arange(START, START + 60_000 * 1000, 60_000, dtype="int64")
+PAGE_ROUNDS: int = 200
+
+
+def legacy_generate_datetime(timestamp: float) -> datetime:
+    """优化前的实现，按本机时区转换后再标记为北京时间"""
+    dt: datetime = datetime.fromtimestamp(timestamp / 1000)
+    return CHINA_TZ.localize(dt)
+
+
+def fixed_generate_datetime(timestamp: float) -> datetime:
+    """只使用固定时区偏移，不缓存"""
+    return EPOCH + timedelta(milliseconds=timestamp)
+
+
+def run(name: str, convert: Callable[[int], datetime]) -> float:
+    """逐条转换推送时间戳，返回每条耗时（微秒）"""
+    start: float = perf_counter()
+    for timestamp in MESSAGES:
+        convert(timestamp)
+    cost: float = (perf_counter() - start) / len(MESSAGES) * 1e6
+
+    print(f"{name:<28}{cost:>10.3f} us/msg")
+    return cost
+
+
+def run_page(name: str, convert: Callable[[np.ndarray], list]) -> float:
+    """转换整页K线时间戳，返回每根K线耗时（微秒）"""
+    start: float = perf_counter()
+    for _ in range(PAGE_ROUNDS):
+        convert(PAGE)
+    cost: float = (perf_counter() - start) / PAGE_ROUNDS / len(PAGE) * 1e6
+
+    print(f"{name:<28}{cost:>10.3f} us/bar")
+    return cost
+
+
+def check() -> None:
+    """与标准库带时区转换的结果对比"""
+    converter: DatetimeConverter = DatetimeConverter()
+    for timestamp in MESSAGES[:2000] + [0, START - START % 1000, START + 0.5]:
+        expected: datetime = datetime.fromtimestamp(timestamp / 1000, CHINA_TZ)
+        result: datetime = converter.convert(timestamp)
+        assert result == expected and result.utcoffset() == expected.utcoffset(), (timestamp, result)
+
+    expected_page: list = [datetime.fromtimestamp(t / 1000, CHINA_TZ) for t in PAGE.tolist()]
+    assert generate_datetimes(PAGE) == expected_page
+
+
+def main():
+    """主入口函数"""
+    check()
+
+    legacy: float = run("legacy", legacy_generate_datetime)
+    fixed: float = run("fixed offset", fixed_generate_datetime)
+    cached: float = run("fixed offset + memo", DatetimeConverter().convert)
+    print(f"per-message saving: {legacy - cached:.3f} us ({legacy / cached:.1f}x), memo vs fixed {fixed / cached:.1f}x")
+
+    page_legacy: float = run_page("page legacy", lambda page: [legacy_generate_datetime(t) for t in page.tolist()])
+    converter: DatetimeConverter = DatetimeConverter()
+    page_memo: float = run_page("page memo", lambda page: [converter.convert(t) for t in page.tolist()])
+    page_numpy: float = run_page("page numpy", generate_datetimes)
+    print(f"per-bar saving: {page_legacy - page_numpy:.3f} us ({page_legacy / page_numpy:.1f}x), numpy vs memo {page_memo / page_numpy:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import hashlib
+import hmac
+import json
+from timeit import timeit
+
+from vnpy.event import EventEngine
+from vnpy_rest import Request
+
+from vnpy_xex import XEXSpotGateway
+from vnpy_xex.xex_gateway import Security
+
+KEY: str = "0" * 32
+SECRET: str = "1" * 64
+NUMBER: int = 20_000
+
+
+def legacy_sign(key: str, secret: bytes, request: Request) -> Request:
+    """优化前的签名实现"""
+    security: Security = request.data["security"]
+    request.data.pop("security")
+    if security == Security.SIGNED:
+        if request.params is None: request.params = {}
+        query = ''
+        for k, value in sorted(request.params.items()):
+            query += f"{k}={value}&"
+        query = query[:-1]
+        signature = hmac.new(secret, query.encode(), hashlib.sha256).hexdigest()
+        headers = {
+            "x_access_key": key,
+            "x_signature": signature,
+            'Content-Type': 'application/json',
+        }
+        if request.headers is None: request.headers = {}
+        request.headers.update(headers)
+    return request
+
+
+def make_request(batch_size: int) -> Request:
+    """生成批量下单请求"""
+    order_params = [
+        {"isCreate": True,
+         "symbol": "btc_usdt",
+         "price": 27000.1 + i,
+         "totalAmount": 0.01,
+         "tradeType": "LIMIT",
+         "direction": "BUY",
+         "clientOrderId": str(230716120000000000 + i)}
+        for i in range(batch_size)
+    ]
+    return Request(
+        method="POST",
+        path="v1/trade/order/batchOrder",
+        params={"list": json.dumps(order_params)},
+        data={"security": Security.SIGNED},
+        headers=None
+    )
+
+
+def main():
+    """主入口函数"""
+    gateway = XEXSpotGateway(EventEngine(), "XEX_SPOT")
+    rest_api = gateway.rest_api
+    rest_api.init_signer(KEY, SECRET)
+    secret: bytes = SECRET.encode()
+
+    for batch_size in (1, 20, 100):
+        request: Request = make_request(batch_size)
+        params: dict = request.params
+
+        # 两种实现的签名结果必须一致
+        expected = legacy_sign(KEY, secret, make_request(batch_size)).headers
+        assert rest_api.sign(make_request(batch_size)).headers == expected
+
+        def run_legacy():
+            legacy_sign(KEY, secret, Request("POST", request.path, params, {"security": Security.SIGNED}, None))
+
+        def run_fast():
+            rest_api.sign(Request("POST", request.path, params, {"security": Security.SIGNED}, None))
+
+        legacy: float = timeit(run_legacy, number=NUMBER)
+        fast: float = timeit(run_fast, number=NUMBER)
+        print(
+            f"batch={batch_size:<4}"
+            f"legacy={NUMBER / legacy:>10,.0f} ops/s  "
+            f"fast={NUMBER / fast:>10,.0f} ops/s  "
+            f"speedup={legacy / fast:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
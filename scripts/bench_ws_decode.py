@@ -0,0 +1,104 @@
+import json
+import sys
+from time import perf_counter
+from typing import Any, List
+
+from vnpy.event import EventEngine
+
+from vnpy_xex import XEXSpotGateway
+from vnpy_xex.xex_gateway import XEXSpotTradeWebsocketApi, json_loads
+
+# 默认回放的推送数据，也可以通过命令行传入每行一条推送的录制文件
+SAMPLE_FRAMES: List[str] = [
+    '{"resType": "uOrder", "data": {"avgPrice": "0", "clientOrderId": "230716120000000001", '
+    '"createTime": 1685411494859, "dealQty": "0", "direction": 1, "orderId": "233662556898590912", '
+    '"orderType": 1, "origQty": "0.2", "price": "1", "state": 1, "symbol": "ltc_usdt"}}',
+    '{"resType": "uBalance", "data": {"coin": "usdt", "freeze": "123", "balance": "1234.5", '
+    '"availableBalance": "1111.5"}}',
+    '{"resType": "uOrder", "data": {"avgPrice": "1", "clientOrderId": "230716120000000001", '
+    '"createTime": 1685411494859, "dealQty": "0.1", "direction": 1, "orderId": "233662556898590912", '
+    '"orderType": 1, "origQty": "0.2", "price": "1", "state": 2, "symbol": "ltc_usdt"}}',
+    '{"resType": "uBalance", "data": {"coin": "ltc", "freeze": "0", "balance": "0.1", '
+    '"availableBalance": "0.1"}}',
+    "pong",
+]
+ROUNDS: int = 20_000
+
+
+def legacy_unpack_data(data: str) -> Any:
+    """优化前的解包实现"""
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError:
+        return data
+
+
+def legacy_on_packet(api: XEXSpotTradeWebsocketApi, packet: Any) -> None:
+    """优化前的分发实现"""
+    if packet == 'succeed':
+        api.gateway.write_log("订阅账户成功")
+    elif packet == 'invalid_ws_token':
+        api.gateway.rest_api.generate_ws_token(api.on_get_ws_token)
+    elif packet == "pong":
+        api.gateway.write_log("pong")
+    elif isinstance(packet, dict) and packet.get("resType") == "uBalance":
+        api.on_account(packet)
+    elif isinstance(packet, dict) and packet.get("resType") == "uOrder":
+        api.on_order(packet)
+
+
+def run(name: str, frames: List[str], handle) -> None:
+    """回放推送并输出每秒处理数量"""
+    start: float = perf_counter()
+    for _ in range(ROUNDS):
+        for frame in frames:
+            handle(frame)
+    cost: float = perf_counter() - start
+
+    print(f"{name:<24}{ROUNDS * len(frames) / cost:>12,.0f} msg/s")
+
+
+def main():
+    """主入口函数"""
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            frames: List[str] = [line.rstrip("\n") for line in f if line.strip()]
+    else:
+        frames = SAMPLE_FRAMES
+
+    gateway = XEXSpotGateway(EventEngine(), "XEX_SPOT")
+    api: XEXSpotTradeWebsocketApi = gateway.trade_ws_api
+    print(f"json backend: {json_loads.__module__}")
+
+    # 只统计解包和分发，处理函数为空
+    handlers: dict = api.packet_handlers
+    text_handlers: dict = api.text_handlers
+    api.packet_handlers = {key: lambda packet: None for key in handlers}
+    api.text_handlers = {key: lambda: None for key in text_handlers}
+    run("decode+dispatch legacy", frames, lambda frame: legacy_dispatch_only(legacy_unpack_data(frame)))
+    run("decode+dispatch fast", frames, lambda frame: api.on_packet(api.unpack_data(frame)))
+
+    # 包含委托和资金处理的完整路径
+    api.packet_handlers = handlers
+    api.text_handlers = text_handlers
+    gateway.write_log = lambda msg: None
+    run("full legacy", frames, lambda frame: legacy_on_packet(api, legacy_unpack_data(frame)))
+    run("full fast", frames, lambda frame: api.on_packet(api.unpack_data(frame)))
+
+
+def legacy_dispatch_only(packet: Any) -> None:
+    """优化前的分发判断，不执行处理函数"""
+    if packet == 'succeed':
+        pass
+    elif packet == 'invalid_ws_token':
+        pass
+    elif packet == "pong":
+        pass
+    elif isinstance(packet, dict) and packet.get("resType") == "uBalance":
+        pass
+    elif isinstance(packet, dict) and packet.get("resType") == "uOrder":
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import json
+import platform
+import sys
+from argparse import ArgumentParser
+from datetime import datetime
+from time import perf_counter_ns
+from typing import Callable, Dict, List
+
+import vnpy_xex
+from vnpy_xex import XEXSpotGateway
+from vnpy_xex.order_id import OrderIdAllocator
+from vnpy_xex.xex_gateway import Security, XEXSpotRestAPi, generate_datetime, symbol_contract_map
+
+# Exchange需在vnpy_xex补充XEX交易所后导入
+from vnpy.event import Event, EventEngine
+from vnpy.trader.constant import Direction, Exchange, OrderType, Product
+from vnpy.trader.object import CancelRequest, ContractData, OrderRequest
+from vnpy_rest import Request
+
+SYMBOL: str = "btc_usdt"
+
+
+class NullEventEngine(EventEngine):
+    """丢弃全部事件的事件引擎，避免队列堆积影响计时"""
+
+    def put(self, event: Event) -> None:
+        """丢弃事件"""
+        pass
+
+
+class FakeRestApi(XEXSpotRestAPi):
+    """进程内模拟传输，签名后直接同步回调成功结果"""
+
+    def send_request(
+            self,
+            method: str,
+            path: str,
+            callback,
+            params: dict = None,
+            data=None,
+            headers: dict = None,
+            on_failed=None,
+            on_error=None,
+            extra=None
+    ) -> Request:
+        """签名并立即回调，替换所有发送路径共用的传输"""
+        request: Request = Request(method, path, params, data, headers, callback, on_failed, on_error, extra)
+        self.sign(request)
+        callback({"code": 0, "data": []}, request)
+        return request
+
+
+def measure(name: str, func: Callable[[int], None], number: int, unit: int = 1) -> dict:
+    """逐次计时，返回吞吐量和延时分位数，unit为每次调用处理的条目数"""
+    costs: List[int] = []
+    for i in range(number):
+        start: int = perf_counter_ns()
+        func(i)
+        costs.append(perf_counter_ns() - start)
+
+    costs.sort()
+    total: int = sum(costs)
+    result: dict = {
+        "name": name,
+        "number": number,
+        "ops": number * unit * 1e9 / total,
+        "p50_us": costs[number // 2] / 1000,
+        "p99_us": costs[min(number * 99 // 100, number - 1)] / 1000,
+    }
+    print(f"{name:<28}{result['ops']:>14,.0f} ops/s  p50={result['p50_us']:>9.2f}us  p99={result['p99_us']:>9.2f}us")
+    return result
+
+
+def make_gateway() -> XEXSpotGateway:
+    """创建使用模拟传输的网关"""
+    gateway: XEXSpotGateway = XEXSpotGateway(NullEventEngine(), "XEX_SPOT")
+    gateway.write_log = lambda msg: None
+
+    rest_api: FakeRestApi = FakeRestApi(gateway)
+    rest_api.init_signer("0" * 32, "1" * 64)
+    rest_api.order_id_allocator = OrderIdAllocator("benchmark")
+    gateway.rest_api = rest_api
+
+    symbol_contract_map[SYMBOL] = ContractData(
+        symbol=SYMBOL,
+        exchange=Exchange.XEX,
+        name="BTC/USDT",
+        pricetick=0.01,
+        size=1,
+        min_volume=0.0001,
+        product=Product.SPOT,
+        gateway_name=gateway.gateway_name
+    )
+    return gateway
+
+
+def make_order_request(i: int) -> OrderRequest:
+    """生成委托请求"""
+    return OrderRequest(
+        symbol=SYMBOL,
+        exchange=Exchange.XEX,
+        direction=Direction.LONG if i % 2 else Direction.SHORT,
+        type=OrderType.LIMIT,
+        volume=0.01,
+        price=27000 + i % 100,
+    )
+
+
+def make_order_packet(orderid: str, deal: float, state: int) -> dict:
+    """生成uOrder推送"""
+    return {
+        "resType": "uOrder",
+        "data": {
+            "avgPrice": "27000",
+            "clientOrderId": orderid,
+            "createTime": 1685411494859,
+            "dealQty": str(deal),
+            "direction": 1,
+            "orderId": "2336625568" + orderid[-8:],
+            "orderType": 1,
+            "origQty": "1",
+            "price": "27000",
+            "state": state,
+            "symbol": SYMBOL,
+        }
+    }
+
+
+def main():
+    """主入口函数"""
+    parser: ArgumentParser = ArgumentParser(description="XEX网关热点路径基准测试")
+    parser.add_argument("--number", type=int, default=20_000, help="每项测试次数")
+    parser.add_argument("--output", default="benchmark_results.json", help="结果输出文件")
+    args = parser.parse_args()
+    number: int = args.number
+
+    gateway: XEXSpotGateway = make_gateway()
+    rest_api: FakeRestApi = gateway.rest_api
+    trade_ws_api = gateway.trade_ws_api
+
+    results: List[dict] = []
+
+    # 下单
+    for batch_size in (1, 10, 100):
+        reqs: List[OrderRequest] = [make_order_request(i) for i in range(batch_size)]
+        results.append(measure(
+            f"send_order batch={batch_size}",
+            lambda i: gateway.send_order(*reqs),
+            max(number // batch_size, 100),
+            batch_size
+        ))
+
+    # 撤单
+    cancel_req: CancelRequest = CancelRequest(orderid="1", symbol=SYMBOL, exchange=Exchange.XEX)
+    results.append(measure("cancel_order", lambda i: gateway.cancel_order(cancel_req), number))
+
+    # 委托推送，每个委托依次收到新委托、两次部分成交和全部成交推送
+    orderids: List[str] = [str(rest_api._new_order_id()) for i in range(number)]
+    packets: List[dict] = []
+    for orderid in orderids:
+        packets.append(make_order_packet(orderid, 0, 1))
+        packets.append(make_order_packet(orderid, 0.25, 2))
+        packets.append(make_order_packet(orderid, 0.5, 2))
+        packets.append(make_order_packet(orderid, 1, 3))
+    results.append(measure("on_order", lambda i: trade_ws_api.on_order(packets[i]), len(packets)))
+
+    # 资金推送
+    balance_packet: dict = {
+        "resType": "uBalance",
+        "data": {"coin": "usdt", "freeze": "123", "balance": "1234.5", "availableBalance": "1111.5"}
+    }
+    results.append(measure("on_account", lambda i: trade_ws_api.on_account(balance_packet), number))
+
+    # 时间转换
+    results.append(measure("generate_datetime", lambda i: generate_datetime(1685411494859 + i), number))
+
+    # 签名
+    params: dict = {"list": json.dumps([{"clientOrderId": str(i), "price": 27000} for i in range(20)])}
+    results.append(measure(
+        "sign batch=20",
+        lambda i: rest_api.sign(Request("POST", "v1/trade/order/batchOrder", params, {"security": Security.SIGNED}, None)),
+        number
+    ))
+
+    output: Dict[str, object] = {
+        "version": vnpy_xex.__version__,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "datetime": datetime.now().isoformat(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=4, ensure_ascii=False)
+    print(f"结果已写入{args.output}")
+
+
+if __name__ == "__main__":
+    main()
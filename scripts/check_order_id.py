@@ -0,0 +1,104 @@
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count
+from threading import Lock, Thread
+from time import perf_counter
+from typing import List
+
+from vnpy_xex.order_id import OrderIdAllocator
+
+NAME: str = "check_order_id"
+
+
+def allocate(number: int, block_size: int) -> List[int]:
+    """新建分配器并分配委托号，模拟一次重启或一个独立进程"""
+    allocator: OrderIdAllocator = OrderIdAllocator(NAME, block_size)
+    return [allocator.new_id() for _ in range(number)]
+
+
+def check_threads(number: int, threads: int, block_size: int) -> None:
+    """多线程共享同一个分配器"""
+    allocator: OrderIdAllocator = OrderIdAllocator(NAME, block_size)
+    results: List[List[int]] = [[] for _ in range(threads)]
+
+    def run(result: List[int]) -> None:
+        for _ in range(number):
+            result.append(allocator.new_id())
+
+    workers: List[Thread] = [Thread(target=run, args=(result,)) for result in results]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    ids: List[int] = [i for result in results for i in result]
+    assert len(ids) == len(set(ids)), "多线程分配出现重复委托号"
+    print(f"多线程：{threads}个线程共分配{len(ids):,}个委托号，无重复")
+
+
+def check_restarts(number: int, restarts: int, block_size: int) -> None:
+    """同一进程内多次重建分配器，模拟断线重连和重启"""
+    ids: List[int] = []
+    for _ in range(restarts):
+        ids.extend(allocate(number, block_size))
+
+    assert len(ids) == len(set(ids)), "重启后出现重复委托号"
+    assert ids == sorted(ids), "重启后委托号未保持递增"
+    print(f"重启：{restarts}次重启共分配{len(ids):,}个委托号，无重复且递增")
+
+
+def check_processes(number: int, processes: int, block_size: int) -> None:
+    """多个进程同时使用同一账户的日志"""
+    with ProcessPoolExecutor(processes) as executor:
+        results: List[List[int]] = list(executor.map(allocate, [number] * processes, [block_size] * processes))
+
+    ids: List[int] = [i for result in results for i in result]
+    assert len(ids) == len(set(ids)), "多进程分配出现重复委托号"
+    print(f"多进程：{processes}个进程共分配{len(ids):,}个委托号，无重复")
+
+
+def check_throughput(number: int, block_size: int) -> None:
+    """与原有的加锁计数方式比较吞吐量"""
+    allocator: OrderIdAllocator = OrderIdAllocator(NAME, block_size)
+    start: float = perf_counter()
+    for _ in range(number):
+        allocator.new_id()
+    fast: float = number / (perf_counter() - start)
+
+    lock: Lock = Lock()
+    counter: List[int] = [0]
+
+    def legacy() -> int:
+        with lock:
+            counter[0] += 1
+            return counter[0]
+
+    start = perf_counter()
+    for _ in range(number):
+        legacy()
+    slow: float = number / (perf_counter() - start)
+
+    raw = count()
+    start = perf_counter()
+    for _ in range(number):
+        next(raw)
+    baseline: float = number / (perf_counter() - start)
+
+    print(f"吞吐量：分配器{fast:,.0f}次/秒，加锁计数{slow:,.0f}次/秒，纯计数{baseline:,.0f}次/秒")
+
+
+def main() -> None:
+    """主入口函数"""
+    parser: ArgumentParser = ArgumentParser(description="本地委托号分配器唯一性和吞吐量检查")
+    parser.add_argument("--number", type=int, default=100_000, help="每个线程或进程的分配次数")
+    parser.add_argument("--block-size", type=int, default=1_000, help="号段大小，取较小值以覆盖更多号段预留")
+    args = parser.parse_args()
+
+    check_threads(args.number, 8, args.block_size)
+    check_restarts(args.number // 10, 20, args.block_size)
+    check_processes(args.number, 4, args.block_size)
+    check_throughput(args.number * 10, 10_000)
+
+
+if __name__ == "__main__":
+    main()
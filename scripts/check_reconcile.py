@@ -0,0 +1,143 @@
+from typing import List
+
+from vnpy_xex import XEXSpotGateway
+
+# Exchange需在vnpy_xex补充XEX交易所后导入
+from vnpy.event import Event, EventEngine
+from vnpy.trader.constant import Direction, Exchange, OrderType, Status
+from vnpy.trader.event import EVENT_ORDER, EVENT_TRADE
+from vnpy.trader.object import OrderData, TradeData
+from vnpy_rest import Request
+
+SYMBOL: str = "btc_usdt"
+ORDERID: str = "230716120000000001"
+EXCHANGE_ORDERID: str = "99"
+
+# 推送和REST中的委托状态编码
+STATE_INT: dict = {"NEW": 1, "PARTIALLY_FILLED": 2, "FILLED": 3}
+
+
+class RecordingEventEngine(EventEngine):
+    """只记录委托和成交事件的事件引擎"""
+
+    def __init__(self) -> None:
+        """构造函数"""
+        super().__init__()
+        self.orders: List[OrderData] = []
+        self.trades: List[TradeData] = []
+
+    def put(self, event: Event) -> None:
+        """记录事件"""
+        if event.type == EVENT_ORDER:
+            self.orders.append(event.data)
+        elif event.type == EVENT_TRADE:
+            self.trades.append(event.data)
+
+
+def push(gateway: XEXSpotGateway, traded: float, state: str, orderid: str = ORDERID) -> None:
+    """模拟uOrder推送"""
+    gateway.trade_ws_api.on_order({
+        "resType": "uOrder",
+        "data": {
+            "avgPrice": "100" if traded else "0",
+            "clientOrderId": orderid,
+            "createTime": 1685411494859,
+            "dealQty": str(traded),
+            "direction": 1,
+            "orderId": EXCHANGE_ORDERID,
+            "orderType": 1,
+            "origQty": "1",
+            "price": "100",
+            "state": STATE_INT[state],
+            "symbol": SYMBOL,
+        }
+    })
+
+
+def query(gateway: XEXSpotGateway, traded: float, state: str) -> None:
+    """模拟listUnfinished返回"""
+    data: dict = {
+        "code": 0,
+        "data": [{
+            "orderId": EXCHANGE_ORDERID,
+            "clientOrderId": ORDERID,
+            "symbol": SYMBOL,
+            "price": "100",
+            "origQty": "1",
+            "orderType": "LIMIT",
+            "orderSide": "BUY",
+            "executedQty": str(traded),
+            "avgPrice": "100",
+            "state": state,
+            "createdTime": 1685411494859,
+        }]
+    }
+    request: Request = Request("GET", "v1/trade/order/listUnfinished", {"symbol": SYMBOL}, None, None, extra=SYMBOL)
+    gateway.rest_api.reconciler.on_query_order(data, request)
+
+
+def check_stale_query() -> None:
+    """过期的listUnfinished数据不会回退委托或重复推送成交"""
+    event_engine: RecordingEventEngine = RecordingEventEngine()
+    gateway: XEXSpotGateway = XEXSpotGateway(event_engine, "XEX_SPOT")
+
+    push(gateway, 0, "NEW")
+    push(gateway, 0.5, "PARTIALLY_FILLED")
+    # 早于上一条推送生成的查询结果
+    query(gateway, 0.3, "PARTIALLY_FILLED")
+    push(gateway, 0.7, "PARTIALLY_FILLED")
+    push(gateway, 1, "FILLED")
+    published: int = len(event_engine.orders)
+    # 委托全部成交后才到达的查询结果
+    query(gateway, 0.9, "PARTIALLY_FILLED")
+
+    volumes: List[float] = [round(trade.volume, 8) for trade in event_engine.trades]
+    assert round(sum(volumes), 8) == 1, f"成交量合计错误：{volumes}"
+    assert len({trade.tradeid for trade in event_engine.trades}) == len(volumes), "成交编号重复"
+    assert len(event_engine.orders) == published, "已结束委托被过期查询结果重新推送"
+
+    order: OrderData = gateway.get_order(ORDERID)
+    assert order.status == Status.ALLTRADED and order.traded == 1, f"委托状态回退：{order.status} {order.traded}"
+
+    print(f"过期对账数据：成交{volumes}，委托推送{published}次，最终状态{order.status.value}")
+
+
+def check_revived_order() -> None:
+    """本地拒单但交易所已接受的委托，后续推送恢复委托且成交不重复计算"""
+    event_engine: RecordingEventEngine = RecordingEventEngine()
+    gateway: XEXSpotGateway = XEXSpotGateway(event_engine, "XEX_SPOT")
+
+    orderid: str = "230716120000000002"
+    gateway.on_order(OrderData(
+        gateway_name=gateway.gateway_name,
+        symbol=SYMBOL,
+        exchange=Exchange.XEX,
+        orderid=orderid,
+        type=OrderType.LIMIT,
+        direction=Direction.LONG,
+        price=100,
+        volume=1,
+        status=Status.REJECTED
+    ))
+
+    push(gateway, 0.5, "PARTIALLY_FILLED", orderid)
+    assert orderid in gateway.order_store.get_active_orderids(SYMBOL), "交易所推送未恢复本地拒单的委托"
+    push(gateway, 1, "FILLED", orderid)
+
+    volumes: List[float] = [round(trade.volume, 8) for trade in event_engine.trades]
+    assert round(sum(volumes), 8) == 1, f"成交量合计错误：{volumes}"
+
+    order: OrderData = gateway.get_order(orderid)
+    assert order.status == Status.ALLTRADED and order.traded == 1, f"委托状态错误：{order.status} {order.traded}"
+
+    print(f"本地拒单恢复：成交{volumes}，最终状态{order.status.value}")
+
+
+def main():
+    """主入口函数"""
+    check_stale_query()
+    check_revived_order()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+from argparse import ArgumentParser
+from collections import Counter
+from time import perf_counter
+
+from vnpy.event import Event, EventEngine
+
+from vnpy_xex import XEXSpotGateway
+from vnpy_xex.journal import JournalReplayer
+
+
+class CountingEventEngine(EventEngine):
+    """只统计事件数量的事件引擎，回放耗时只包含网关处理"""
+
+    def __init__(self) -> None:
+        """构造函数"""
+        super().__init__()
+        self.counter: Counter = Counter()
+
+    def put(self, event: Event) -> None:
+        """统计事件"""
+        self.counter[event.type.split(".")[0]] += 1
+
+
+def main():
+    """主入口函数"""
+    parser: ArgumentParser = ArgumentParser(description="回放XEX网关录制文件")
+    parser.add_argument("path", help="录制文件路径，即网关设置中的录制文件")
+    parser.add_argument("--speed", type=float, default=0, help="回放速度倍数，0为尽快回放")
+    args = parser.parse_args()
+
+    event_engine: CountingEventEngine = CountingEventEngine()
+    gateway: XEXSpotGateway = XEXSpotGateway(event_engine, "XEX_SPOT")
+    gateway.rest_api.load_contract_cache()
+
+    replayer: JournalReplayer = JournalReplayer(gateway)
+    start: float = perf_counter()
+    replayer.replay(args.path, args.speed)
+    cost: float = perf_counter() - start
+
+    print(f"回放记录{replayer.count:,}条，跳过{replayer.skipped:,}条，耗时{cost:.3f}秒，{replayer.count / cost:,.0f}条/秒")
+    for event_type, number in event_engine.counter.most_common():
+        print(f"{event_type:<16}{number:>10,}")
+
+
+if __name__ == "__main__":
+    main()
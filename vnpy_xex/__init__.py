@@ -17,6 +17,7 @@ if "XEX" not in exchange_names:
 import importlib_metadata
 
 from .xex_gateway import XEXSpotGateway
+from .sharding import XEXSpotShardGateway
 
 try:
     __version__ = importlib_metadata.version("vnpy_xex")
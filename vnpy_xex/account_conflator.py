@@ -0,0 +1,92 @@
+from asyncio import AbstractEventLoop
+from threading import Lock
+from typing import Callable, Dict
+
+from vnpy.trader.object import AccountData
+
+
+class AccountConflator:
+    """
+    资金推送合并器
+
+    每个币种只保留最新的资金数据，在合并间隔结束后统一推送。
+    币种首次出现或余额变化比例超过阈值时立即推送，不等待间隔结束。
+    """
+
+    def __init__(
+            self,
+            loop: AbstractEventLoop,
+            interval: float,
+            threshold: float,
+            callback: Callable[[AccountData], None]
+    ) -> None:
+        """构造函数，interval单位为秒，threshold为变化比例，0表示不按变化立即推送"""
+        self.loop: AbstractEventLoop = loop
+        self.interval: float = interval
+        self.threshold: float = threshold
+        self.callback: Callable[[AccountData], None] = callback
+
+        self.lock: Lock = Lock()
+        self.pending: Dict[str, AccountData] = {}
+        self.published: Dict[str, AccountData] = {}
+
+        # 统计指标
+        self.received: int = 0
+        self.pushed: int = 0
+
+    def update(self, account: AccountData) -> None:
+        """收到资金数据"""
+        accountid: str = account.accountid
+
+        with self.lock:
+            self.received += 1
+
+            immediate: bool = self.is_significant(account)
+            if immediate:
+                self.pending.pop(accountid, None)
+                self.published[accountid] = account
+                self.pushed += 1
+            else:
+                first: bool = not self.pending
+                self.pending[accountid] = account
+
+        # 由间隔内第一条缓存数据启动定时
+        if immediate:
+            self.callback(account)
+        elif first:
+            self.loop.call_soon_threadsafe(self.loop.call_later, self.interval, self.flush)
+
+    def is_significant(self, account: AccountData) -> bool:
+        """与上次推送相比变化是否超过阈值"""
+        last: AccountData = self.published.get(account.accountid, None)
+        if last is None:
+            return True
+
+        if not self.threshold:
+            return False
+
+        for new, old in ((account.balance, last.balance), (account.frozen, last.frozen)):
+            if new == old:
+                continue
+            if not old or abs(new - old) >= abs(old) * self.threshold:
+                return True
+        return False
+
+    def flush(self) -> None:
+        """推送缓存的全部资金数据"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.published.update(pending)
+            self.pushed += len(pending)
+
+        for account in pending.values():
+            self.callback(account)
+
+    def get_metrics(self) -> dict:
+        """获取合并统计指标"""
+        with self.lock:
+            return {
+                "received": self.received,
+                "pushed": self.pushed,
+                "pending": len(self.pending),
+            }
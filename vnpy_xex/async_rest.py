@@ -0,0 +1,104 @@
+from asyncio import AbstractEventLoop, get_running_loop, new_event_loop, run_coroutine_threadsafe
+from typing import Any, Coroutine
+
+from aiohttp import ClientSession, TCPConnector
+from vnpy_rest import Request, Response, RestClient
+from vnpy_websocket.websocket_client import start_event_loop
+
+
+class AsyncRestClient(RestClient):
+    """
+    运行在外部事件循环上的REST客户端
+
+    可以直接复用Websocket客户端所在的事件循环，请求使用带长连接池的aiohttp会话并发执行，
+    在事件循环线程内提交的请求不经过跨线程调度。回调、on_failed和on_error接口与RestClient一致。
+    """
+
+    # 连接池大小
+    pool_size: int = 16
+    # 空闲连接保持时间（秒）
+    keepalive_timeout: float = 60
+
+    def start(self, session_number: int = 3) -> None:
+        """启动客户端，未指定事件循环时创建新的事件循环"""
+        if not self.loop or self.loop.is_closed():
+            self.loop = new_event_loop()
+
+        start_event_loop(self.loop)
+
+    def stop(self) -> None:
+        """关闭会话，事件循环由其所有者负责停止"""
+        session: ClientSession = self.session
+        self.session = None
+
+        if session and self.loop and self.loop.is_running():
+            run_coroutine_threadsafe(session.close(), self.loop)
+
+    def add_request(
+            self,
+            method: str,
+            path: str,
+            callback,
+            params: dict = None,
+            data: Any = None,
+            headers: dict = None,
+            on_failed=None,
+            on_error=None,
+            extra: Any = None,
+    ) -> Request:
+        """添加新的请求任务"""
+        request: Request = Request(
+            method,
+            path,
+            params,
+            data,
+            headers,
+            callback,
+            on_failed,
+            on_error,
+            extra,
+        )
+
+        self._submit(self._process_request(request))
+        return request
+
+    def _submit(self, coro: Coroutine) -> None:
+        """在事件循环中创建任务"""
+        try:
+            running_loop: AbstractEventLoop = get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self.loop:
+            self.loop.create_task(coro)
+        else:
+            self.loop.call_soon_threadsafe(self.loop.create_task, coro)
+
+    def _get_session(self) -> ClientSession:
+        """获取带连接池的会话，需在事件循环中调用"""
+        if not self.session or self.session.closed:
+            connector: TCPConnector = TCPConnector(
+                limit=self.pool_size,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self.session = ClientSession(connector=connector, trust_env=True)
+        return self.session
+
+    async def _get_response(self, request: Request) -> Response:
+        """发送请求到服务器，并返回处理结果对象"""
+        request = self.sign(request)
+        url: str = self._make_full_url(request.path)
+
+        session: ClientSession = self._get_session()
+        async with session.request(
+            request.method,
+            url,
+            headers=request.headers,
+            params=request.params,
+            data=request.data,
+            proxy=self.proxy
+        ) as cr:
+            text: str = await cr.text()
+
+        request.response = Response(cr.status, text)
+        return request.response
@@ -0,0 +1,127 @@
+from typing import Iterator, List, Union
+
+import numpy as np
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+
+from .bar_cache import BAR_DTYPE
+from .timestamp import generate_datetime, generate_datetimes, to_datetime64
+
+# 迭代时每次批量转换时间的K线数量
+ITER_CHUNK: int = 1024
+
+
+class BarArray:
+    """
+    列式K线数据
+
+    各字段为连续存储的NumPy数组，计算指标时直接使用，无需创建BarData。
+    迭代或按下标访问时才按需生成BarData，切片返回共享数据的BarArray。
+    """
+
+    def __init__(
+            self,
+            symbol: str,
+            exchange: Exchange,
+            interval: Interval,
+            gateway_name: str,
+            bars: np.ndarray = None
+    ) -> None:
+        """构造函数，bars为BAR_DTYPE格式的数组"""
+        if bars is None:
+            bars = np.empty(0, dtype=BAR_DTYPE)
+
+        self.symbol: str = symbol
+        self.exchange: Exchange = exchange
+        self.interval: Interval = interval
+        self.gateway_name: str = gateway_name
+
+        # 毫秒时间戳
+        self.timestamps: np.ndarray = np.ascontiguousarray(bars["datetime"])
+        self.open_price: np.ndarray = np.ascontiguousarray(bars["open"])
+        self.high_price: np.ndarray = np.ascontiguousarray(bars["high"])
+        self.low_price: np.ndarray = np.ascontiguousarray(bars["low"])
+        self.close_price: np.ndarray = np.ascontiguousarray(bars["close"])
+        self.volume: np.ndarray = np.ascontiguousarray(bars["volume"])
+        self.turnover: np.ndarray = np.ascontiguousarray(bars["turnover"])
+
+    @property
+    def datetimes(self) -> np.ndarray:
+        """北京时间的datetime64[ms]数组"""
+        return to_datetime64(self.timestamps)
+
+    def __len__(self) -> int:
+        """K线数量"""
+        return len(self.timestamps)
+
+    def __iter__(self) -> Iterator[BarData]:
+        """逐个生成BarData，时间按批转换"""
+        for start in range(0, len(self), ITER_CHUNK):
+            end: int = start + ITER_CHUNK
+            datetimes: list = generate_datetimes(self.timestamps[start:end])
+            rows = zip(
+                datetimes,
+                self.open_price[start:end].tolist(),
+                self.high_price[start:end].tolist(),
+                self.low_price[start:end].tolist(),
+                self.close_price[start:end].tolist(),
+                self.volume[start:end].tolist(),
+                self.turnover[start:end].tolist(),
+            )
+            for dt, open_price, high_price, low_price, close_price, volume, turnover in rows:
+                yield BarData(
+                    symbol=self.symbol,
+                    exchange=self.exchange,
+                    datetime=dt,
+                    interval=self.interval,
+                    open_price=open_price,
+                    high_price=high_price,
+                    low_price=low_price,
+                    close_price=close_price,
+                    volume=volume,
+                    turnover=turnover,
+                    gateway_name=self.gateway_name
+                )
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[BarData, "BarArray"]:
+        """下标访问返回BarData，切片返回BarArray"""
+        if isinstance(index, slice):
+            array: BarArray = BarArray(self.symbol, self.exchange, self.interval, self.gateway_name)
+            array.timestamps = self.timestamps[index]
+            array.open_price = self.open_price[index]
+            array.high_price = self.high_price[index]
+            array.low_price = self.low_price[index]
+            array.close_price = self.close_price[index]
+            array.volume = self.volume[index]
+            array.turnover = self.turnover[index]
+            return array
+
+        return BarData(
+            symbol=self.symbol,
+            exchange=self.exchange,
+            datetime=generate_datetime(int(self.timestamps[index])),
+            interval=self.interval,
+            open_price=float(self.open_price[index]),
+            high_price=float(self.high_price[index]),
+            low_price=float(self.low_price[index]),
+            close_price=float(self.close_price[index]),
+            volume=float(self.volume[index]),
+            turnover=float(self.turnover[index]),
+            gateway_name=self.gateway_name
+        )
+
+    def to_records(self) -> np.ndarray:
+        """转换为BAR_DTYPE格式的数组"""
+        bars: np.ndarray = np.empty(len(self), dtype=BAR_DTYPE)
+        bars["datetime"] = self.timestamps
+        bars["open"] = self.open_price
+        bars["high"] = self.high_price
+        bars["low"] = self.low_price
+        bars["close"] = self.close_price
+        bars["volume"] = self.volume
+        bars["turnover"] = self.turnover
+        return bars
+
+    def to_list(self) -> List[BarData]:
+        """全部转换为BarData列表"""
+        return list(self)
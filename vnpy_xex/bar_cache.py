@@ -0,0 +1,102 @@
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+from vnpy.trader.constant import Interval
+from vnpy.trader.utility import get_folder_path
+
+# K线列式存储格式，datetime为毫秒时间戳
+BAR_DTYPE: np.dtype = np.dtype([
+    ("datetime", "i8"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8"),
+    ("turnover", "f8"),
+])
+
+
+def merge_bars(*arrays: np.ndarray) -> np.ndarray:
+    """合并K线数组，按时间排序并去重（重复时间戳保留靠后数组中的数据）"""
+    arrays = [a for a in arrays if len(a)]
+    if not arrays:
+        return np.empty(0, dtype=BAR_DTYPE)
+
+    merged: np.ndarray = np.concatenate(arrays)
+    # 倒序后np.unique返回每个时间戳第一次出现的位置，即原数组中最后一次出现的数据
+    reversed_times: np.ndarray = merged["datetime"][::-1]
+    _, index = np.unique(reversed_times, return_index=True)
+    return merged[len(merged) - 1 - index]
+
+
+class BarCache:
+    """
+    本地K线列式缓存，每个合约和周期对应一个npy文件
+
+    另外记录已经确认下载过的最早时间，合约上市前等没有数据的时间段不再重复下载。
+    """
+
+    def __init__(self, folder_name: str = "xex_bar_cache") -> None:
+        """构造函数"""
+        self.folder: Path = get_folder_path(folder_name)
+        self.lock: Lock = Lock()
+
+    def get_path(self, symbol: str, interval: Interval) -> Path:
+        """获取缓存文件路径"""
+        return self.folder.joinpath(f"{symbol}_{interval.value}.npy")
+
+    def get_start_path(self, symbol: str, interval: Interval) -> Path:
+        """获取已下载最早时间的记录文件路径"""
+        return self.folder.joinpath(f"{symbol}_{interval.value}.start")
+
+    def load_start(self, symbol: str, interval: Interval) -> int:
+        """读取已下载的最早毫秒时间戳，没有记录时返回0"""
+        path: Path = self.get_start_path(symbol, interval)
+        if not path.exists():
+            return 0
+
+        with self.lock:
+            try:
+                return int(path.read_text())
+            except ValueError:
+                return 0
+
+    def save_start(self, symbol: str, interval: Interval, start: int) -> None:
+        """记录已下载的最早毫秒时间戳，只会向前更新"""
+        with self.lock:
+            path: Path = self.get_start_path(symbol, interval)
+            if path.exists():
+                try:
+                    start = min(start, int(path.read_text()))
+                except ValueError:
+                    pass
+
+            temp_path: Path = path.with_suffix(".start.tmp")
+            temp_path.write_text(str(start))
+            temp_path.replace(path)
+
+    def load(self, symbol: str, interval: Interval) -> np.ndarray:
+        """读取缓存K线"""
+        path: Path = self.get_path(symbol, interval)
+        if not path.exists():
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        with self.lock:
+            return np.load(path, allow_pickle=False)
+
+    def save(self, symbol: str, interval: Interval, bars: np.ndarray) -> np.ndarray:
+        """合并并写入缓存K线，返回合并后的全部数据"""
+        with self.lock:
+            path: Path = self.get_path(symbol, interval)
+            if path.exists():
+                bars = merge_bars(np.load(path, allow_pickle=False), bars)
+            else:
+                bars = merge_bars(bars)
+
+            # 先写临时文件再替换，避免进程中断导致缓存损坏
+            temp_path: Path = path.with_suffix(".tmp.npy")
+            np.save(temp_path, bars, allow_pickle=False)
+            temp_path.replace(path)
+
+        return bars
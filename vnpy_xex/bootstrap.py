@@ -0,0 +1,73 @@
+from threading import Lock
+from time import monotonic
+from typing import Callable, Dict, List, Sequence, Set, Tuple
+
+
+class Bootstrap:
+    """
+    连接启动阶段管理
+
+    各阶段完成时调用mark标记就绪，依赖其他阶段的任务通过when注册，
+    在依赖全部就绪后立即执行。所有阶段就绪后回调on_ready并传入各阶段耗时。
+    """
+
+    def __init__(self, on_ready: Callable[[Dict[str, float]], None]) -> None:
+        """构造函数"""
+        self.on_ready: Callable[[Dict[str, float]], None] = on_ready
+
+        self.lock: Lock = Lock()
+        self.phases: Set[str] = set()
+        self.ready: Set[str] = set()
+        self.timings: Dict[str, float] = {}
+        self.waiters: List[Tuple[Set[str], Callable[[], None]]] = []
+        self.start_time: float = 0
+
+    def reset(self, phases: Sequence[str]) -> None:
+        """开始新的启动流程"""
+        with self.lock:
+            self.phases = set(phases)
+            self.ready = set()
+            self.timings = {}
+            self.waiters = []
+            self.start_time = monotonic()
+
+    def is_ready(self, phase: str) -> bool:
+        """阶段是否已就绪，不在当前启动流程中的阶段视为就绪"""
+        return phase in self.ready or phase not in self.phases
+
+    def mark(self, phase: str) -> None:
+        """标记阶段就绪，并执行依赖已满足的任务"""
+        with self.lock:
+            if phase in self.ready or phase not in self.phases:
+                return
+
+            self.ready.add(phase)
+            self.timings[phase] = monotonic() - self.start_time
+
+            callbacks: List[Callable[[], None]] = []
+            waiters: List[Tuple[Set[str], Callable[[], None]]] = []
+            for deps, callback in self.waiters:
+                if deps <= self.ready:
+                    callbacks.append(callback)
+                else:
+                    waiters.append((deps, callback))
+            self.waiters = waiters
+
+            finished: bool = self.ready == self.phases
+            timings: Dict[str, float] = dict(self.timings)
+
+        for callback in callbacks:
+            callback()
+
+        if finished:
+            self.on_ready(timings)
+
+    def when(self, deps: Sequence[str], callback: Callable[[], None]) -> None:
+        """依赖阶段全部就绪后执行任务"""
+        with self.lock:
+            deps = {phase for phase in deps if phase in self.phases}
+            if not deps <= self.ready:
+                self.waiters.append((deps, callback))
+                return
+
+        callback()
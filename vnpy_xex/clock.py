@@ -0,0 +1,54 @@
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+
+class ClockSync:
+    """
+    服务器时钟偏差估计
+
+    每次采样记录发出请求和收到返回的本地时间以及服务器时间，按NTP的方式计算偏差和往返时延，
+    取最近若干次采样中往返时延最小的一次作为偏差估计，排队和网络抖动对其影响最小。
+    """
+
+    def __init__(self, sample_size: int = 8) -> None:
+        """构造函数"""
+        # (往返时延, 偏差)，单位为毫秒
+        self.samples: Deque[Tuple[float, float]] = deque(maxlen=sample_size)
+
+        self.offset: float = 0
+        self.rtt: float = 0
+        self.synced: bool = False
+        self.sample_count: int = 0
+
+    def add_sample(self, send_time: float, server_time: float, receive_time: float) -> None:
+        """添加采样，时间单位均为毫秒"""
+        rtt: float = receive_time - send_time
+        if rtt < 0:
+            return
+
+        offset: float = server_time - (send_time + receive_time) / 2
+        self.samples.append((rtt, offset))
+        self.sample_count += 1
+
+        self.rtt, self.offset = min(self.samples)
+        self.synced = True
+
+    def now(self) -> int:
+        """校正后的当前服务器时间，毫秒时间戳"""
+        return int(time.time() * 1000 + self.offset)
+
+    def get_latency(self, server_time: float) -> float:
+        """服务器时间戳到当前的单向时延（毫秒），未完成同步时返回0"""
+        if not self.synced:
+            return 0
+        return max(time.time() * 1000 + self.offset - server_time, 0)
+
+    def get_metrics(self) -> dict:
+        """获取时钟同步指标"""
+        return {
+            "synced": self.synced,
+            "offset_ms": self.offset,
+            "rtt_ms": self.rtt,
+            "sample_count": self.sample_count,
+        }
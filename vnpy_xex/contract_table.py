@@ -0,0 +1,40 @@
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+# 合约表存储格式，定长字段便于多进程内存映射只读共享
+CONTRACT_DTYPE: np.dtype = np.dtype([
+    ("symbol", "U32"),
+    ("name", "U32"),
+    ("pricetick", "f8"),
+    ("min_volume", "f8"),
+])
+
+
+def save_contract_table(path: Path, contracts: Dict[str, dict]) -> None:
+    """写入合约表，contracts格式与合约信息缓存相同"""
+    table: np.ndarray = np.empty(len(contracts), dtype=CONTRACT_DTYPE)
+    for i, (symbol, d) in enumerate(contracts.items()):
+        table[i] = (symbol, d["name"], d["pricetick"], d["min_volume"])
+
+    # 先写临时文件再替换，正在映射旧文件的进程不受影响
+    temp_path: Path = path.with_suffix(".tmp.npy")
+    np.save(temp_path, table, allow_pickle=False)
+    temp_path.replace(path)
+
+
+def load_contract_table(path: Path) -> Dict[str, dict]:
+    """以内存映射方式读取合约表，返回格式与合约信息缓存相同"""
+    if not path.exists():
+        return {}
+
+    table: np.ndarray = np.load(path, mmap_mode="r", allow_pickle=False)
+    return {
+        str(row["symbol"]): {
+            "name": str(row["name"]),
+            "pricetick": float(row["pricetick"]),
+            "min_volume": float(row["min_volume"]),
+        }
+        for row in table
+    }
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class FillIndex:
+    """
+    成交去重索引
+
+    登记已推送的成交编号，断线重连补齐或回放时重复出现的成交不再推送。
+    按登记顺序淘汰最早的编号，保证长时间运行时内存不增长。
+    """
+
+    def __init__(self, capacity: int = 100_000) -> None:
+        """构造函数"""
+        self.capacity: int = capacity
+
+        self.lock: Lock = Lock()
+        self.tradeids: "OrderedDict[str, None]" = OrderedDict()
+
+    def add(self, tradeid: str) -> bool:
+        """登记成交编号，已登记过时返回False"""
+        with self.lock:
+            if tradeid in self.tradeids:
+                return False
+
+            self.tradeids[tradeid] = None
+            if len(self.tradeids) > self.capacity:
+                self.tradeids.popitem(last=False)
+            return True
+
+    def __contains__(self, tradeid: str) -> bool:
+        return tradeid in self.tradeids
+
+    def __len__(self) -> int:
+        return len(self.tradeids)
+
+
+def generate_tradeid(exchange_orderid: str, traded: float) -> str:
+    """由交易所委托号和累计成交量生成成交编号，同一笔成交无论从哪个通道收到编号都相同"""
+    return f"{exchange_orderid}_{traded:.12g}"
+
+
+def calculate_fill_price(last_traded: float, last_avg_price: float, traded: float, avg_price: float) -> float:
+    """由成交均价的变化计算新增成交的价格，无法计算时返回0"""
+    volume: float = traded - last_traded
+    if volume <= 0 or not avg_price:
+        return 0
+
+    price: float = (avg_price * traded - last_avg_price * last_traded) / volume
+
+    # 均价精度不足时可能算出异常值，退回使用最新均价
+    if price <= 0:
+        return avg_price
+    return round(price, 10)
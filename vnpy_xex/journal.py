@@ -0,0 +1,195 @@
+import json
+import mmap
+import os
+import time
+from struct import Struct
+from threading import Lock
+from typing import Any, Callable, Iterator, List, Tuple
+
+from vnpy_rest import Request, Response
+
+# 记录来源
+CHANNEL_TRADE_WS: int = 0
+CHANNEL_MARKET_WS: int = 1
+CHANNEL_REST: int = 2
+
+# 记录头：记录总长度（含记录头）、接收时间戳、来源，总长度为0表示数据结束
+RECORD_HEADER: Struct = Struct("<IdB")
+
+
+class Journal:
+    """
+    收发数据录制文件
+
+    通过内存映射追加写入Websocket原始文本和REST原始返回，空间不足时按倍数扩展文件，
+    关闭时截断到实际数据长度。已存在的录制文件在末尾继续追加。
+    """
+
+    def __init__(self, path: str, initial_size: int = 64 * 1024 * 1024) -> None:
+        """构造函数"""
+        self.path: str = path
+        self.lock: Lock = Lock()
+
+        if not os.path.exists(path):
+            open(path, "wb").close()
+
+        self.file = open(path, "r+b")
+        size: int = os.path.getsize(path)
+        if size < initial_size:
+            self.file.truncate(initial_size)
+            size = initial_size
+
+        self.mm: mmap.mmap = mmap.mmap(self.file.fileno(), size)
+        self.size: int = size
+        self.pos: int = find_end(self.mm)
+
+    def append(self, channel: int, text: str) -> None:
+        """追加一条记录"""
+        payload: bytes = text.encode()
+        length: int = RECORD_HEADER.size + len(payload)
+
+        with self.lock:
+            if not self.mm:
+                return
+
+            pos: int = self.pos
+            # 保留记录头长度的空白作为结束标记
+            required: int = pos + length + RECORD_HEADER.size
+            if required > self.size:
+                while self.size < required:
+                    self.size *= 2
+                self.mm.resize(self.size)
+
+            RECORD_HEADER.pack_into(self.mm, pos, length, time.time(), channel)
+            self.mm[pos + RECORD_HEADER.size:pos + length] = payload
+            self.pos = pos + length
+
+    def close(self) -> None:
+        """关闭文件并截断未使用的空间"""
+        with self.lock:
+            if not self.mm:
+                return
+
+            self.mm.flush()
+            self.mm.close()
+            self.mm = None
+
+            self.file.truncate(self.pos)
+            self.file.close()
+
+
+def find_end(buffer: Any) -> int:
+    """查找数据结束位置"""
+    pos: int = 0
+    end: int = len(buffer) - RECORD_HEADER.size
+    while pos <= end:
+        length: int = RECORD_HEADER.unpack_from(buffer, pos)[0]
+        if not length or pos + length > len(buffer):
+            break
+        pos += length
+    return pos
+
+
+def read_journal(path: str) -> Iterator[Tuple[float, int, str]]:
+    """读取录制文件，逐条返回(接收时间戳, 来源, 文本)"""
+    if not os.path.getsize(path):
+        return
+
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end: int = find_end(mm)
+            pos: int = 0
+            while pos < end:
+                length, timestamp, channel = RECORD_HEADER.unpack_from(mm, pos)
+                yield timestamp, channel, mm[pos + RECORD_HEADER.size:pos + length].decode()
+                pos += length
+
+
+def pack_response(request: Request, response: Response) -> str:
+    """生成REST返回的记录文本"""
+    callback: Callable = request.callback
+    return json.dumps({
+        "method": request.method,
+        "path": request.path,
+        "params": request.params,
+        "callback": callback.__name__ if callback else None,
+        "extra": request.extra if isinstance(request.extra, str) else None,
+        "status_code": response.status_code,
+        "text": response.text,
+    })
+
+
+class JournalReplayer:
+    """
+    录制数据回放
+
+    Websocket记录经过unpack_data和on_packet，REST记录按录制时的回调函数名调用REST API
+    和委托对账中的对应回调，与实盘使用相同的处理函数。speed为0时尽快回放，否则按原始时间间隔除以speed回放。
+    """
+
+    def __init__(self, gateway: Any) -> None:
+        """构造函数"""
+        self.gateway: Any = gateway
+
+        rest_api: Any = gateway.rest_api
+        # 只回放数据处理回调，获取ws-Token等会触发发送的回调跳过
+        self.callback_owners: List[Any] = [rest_api, rest_api.reconciler]
+
+        # 统计指标
+        self.count: int = 0
+        self.skipped: int = 0
+
+    def replay(self, path: str, speed: float = 0) -> None:
+        """回放录制文件"""
+        ws_apis: dict = {
+            CHANNEL_TRADE_WS: self.gateway.trade_ws_api,
+            CHANNEL_MARKET_WS: self.gateway.market_ws_api,
+        }
+
+        first_time: float = 0
+        start_time: float = time.time()
+
+        for timestamp, channel, text in read_journal(path):
+            if speed:
+                if not first_time:
+                    first_time = timestamp
+                wait: float = (timestamp - first_time) / speed - (time.time() - start_time)
+                if wait > 0:
+                    time.sleep(wait)
+
+            ws_api: Any = ws_apis.get(channel, None)
+            if ws_api:
+                ws_api.on_packet(ws_api.unpack_data(text))
+            elif not self.replay_response(text):
+                self.skipped += 1
+                continue
+
+            self.count += 1
+
+    def replay_response(self, text: str) -> bool:
+        """回放REST返回，找不到对应回调时返回False"""
+        d: dict = json.loads(text)
+
+        if d["status_code"] // 100 != 2 or not d["callback"]:
+            return False
+
+        callback: Callable = None
+        for owner in self.callback_owners:
+            callback = getattr(owner, d["callback"], None)
+            if callback:
+                break
+        else:
+            return False
+
+        request: Request = Request(
+            method=d["method"],
+            path=d["path"],
+            params=d["params"],
+            data=None,
+            headers=None,
+            callback=callback,
+            extra=d["extra"]
+        )
+        request.response = Response(d["status_code"], d["text"])
+        callback(request.response.json(), request)
+        return True
@@ -0,0 +1,268 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import monotonic, monotonic_ns
+from typing import Callable, Dict, List, Optional, Tuple
+
+from vnpy.trader.constant import Status
+
+from .clock import ClockSync
+
+# 直方图每个2的幂区间内的子桶数量为2^(SUB_BITS-1)，相对误差约3%
+SUB_BITS: int = 5
+SUB_COUNT: int = 1 << SUB_BITS
+HALF_COUNT: int = SUB_COUNT >> 1
+# 最大记录约2^40微秒，超过时计入最后一个桶
+BUCKET_COUNT: int = (40 - SUB_BITS + 1) * HALF_COUNT + SUB_COUNT
+
+# 统计的分位数
+PERCENTILES: Tuple[float, ...] = (50, 90, 99, 99.9)
+
+
+def get_bucket(value: int) -> int:
+    """数值所在的桶"""
+    if value < SUB_COUNT:
+        return max(value, 0)
+
+    shift: int = value.bit_length() - SUB_BITS
+    index: int = shift * HALF_COUNT + (value >> shift)
+    return min(index, BUCKET_COUNT - 1)
+
+
+def get_bucket_value(index: int) -> int:
+    """桶的代表数值（区间中点）"""
+    if index < SUB_COUNT:
+        return index
+
+    shift, mantissa = divmod(index, HALF_COUNT)
+    shift -= 1
+    mantissa += HALF_COUNT
+    return (mantissa << shift) + (1 << shift) // 2
+
+
+class Histogram:
+    """对数分桶的延时直方图，数值单位为微秒"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        """构造函数"""
+        self.counts: List[int] = [0] * BUCKET_COUNT
+        self.count: int = 0
+        self.total: int = 0
+        self.max: int = 0
+
+    def record(self, value: int) -> None:
+        """记录数值"""
+        self.counts[get_bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram") -> None:
+        """合并另一个直方图"""
+        counts: List[int] = self.counts
+        for i, n in enumerate(other.counts):
+            if n:
+                counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def get_summary(self) -> dict:
+        """获取数量、均值、分位数和最大值"""
+        summary: dict = {
+            "count": self.count,
+            "mean_us": self.total / self.count if self.count else 0,
+            "max_us": self.max,
+        }
+
+        targets: List[Tuple[str, float]] = [(f"p{p:g}_us", self.count * p / 100) for p in PERCENTILES]
+        cumulative: int = 0
+        i: int = 0
+        for index, n in enumerate(self.counts):
+            if not n:
+                continue
+            cumulative += n
+            while i < len(targets) and cumulative >= targets[i][1]:
+                summary[targets[i][0]] = min(get_bucket_value(index), self.max)
+                i += 1
+            if i == len(targets):
+                break
+
+        for name, _ in targets[i:]:
+            summary[name] = 0
+        return summary
+
+
+class RollingHistogram:
+    """
+    滚动窗口直方图
+
+    按时间片轮换使用多个直方图，统计时合并窗口内的时间片，
+    另外保留启动以来的累计直方图。
+    """
+
+    def __init__(self, slot_seconds: float = 10, slot_count: int = 6) -> None:
+        """构造函数，默认统计最近1分钟"""
+        self.slot_seconds: float = slot_seconds
+        self.slots: List[Histogram] = [Histogram() for _ in range(slot_count)]
+        self.epochs: List[int] = [-1] * slot_count
+        self.total: Histogram = Histogram()
+
+    def record(self, value: int, now: float) -> None:
+        """记录数值"""
+        epoch: int = int(now / self.slot_seconds)
+        i: int = epoch % len(self.slots)
+        if self.epochs[i] != epoch:
+            self.slots[i] = Histogram()
+            self.epochs[i] = epoch
+
+        self.slots[i].record(value)
+        self.total.record(value)
+
+    def get_summary(self, now: float) -> dict:
+        """获取滚动窗口和累计统计"""
+        epoch: int = int(now / self.slot_seconds)
+        window: Histogram = Histogram()
+        for slot, slot_epoch in zip(self.slots, self.epochs):
+            if epoch - slot_epoch < len(self.slots):
+                window.merge(slot)
+
+        return {
+            "window": window.get_summary(),
+            "total": self.total.get_summary(),
+        }
+
+
+class LatencyMetrics:
+    """
+    委托生命周期延时统计
+
+    以本地委托号记录下单、确认和撤单的时间，计算下单到确认、确认到成交、撤单到撤销完成的延时，
+    按合约统计。REST请求耗时按接口统计。
+    时钟同步完成后，还按合约统计交易所时间戳到本地收到推送的单向时延。
+    """
+
+    def __init__(self, clock: ClockSync = None, max_orders: int = 100_000) -> None:
+        """构造函数"""
+        self.clock: ClockSync = clock
+        self.max_orders: int = max_orders
+
+        self.lock: Lock = Lock()
+        # 委托号: [合约, 下单时间, 确认时间, 撤单时间]，时间为单调时钟纳秒
+        self.stages: Dict[str, list] = {}
+        self.histograms: Dict[Tuple[str, str], RollingHistogram] = {}
+
+    def record(self, name: str, key: str, value: int) -> None:
+        """记录延时，value单位为微秒"""
+        histogram: RollingHistogram = self.histograms.get((name, key), None)
+        if histogram is None:
+            histogram = self.histograms.setdefault((name, key), RollingHistogram())
+        histogram.record(value, monotonic())
+
+    def on_send(self, orderid: str, symbol: str) -> None:
+        """发出委托"""
+        with self.lock:
+            self.stages[orderid] = [symbol, monotonic_ns(), 0, 0]
+
+            # 超出上限时淘汰最早的委托
+            if len(self.stages) > self.max_orders:
+                self.stages.pop(next(iter(self.stages)))
+
+    def on_cancel(self, orderid: str) -> None:
+        """发出撤单"""
+        with self.lock:
+            stage: list = self.stages.get(orderid, None)
+            if stage and not stage[3]:
+                stage[3] = monotonic_ns()
+
+    def on_order(self, orderid: str, status: Status, filled: bool, active: bool, create_time: int = 0) -> None:
+        """收到委托推送，filled表示本次推送有新增成交，create_time为交易所委托创建时间"""
+        now: int = monotonic_ns()
+
+        with self.lock:
+            stage: list = self.stages.get(orderid, None)
+            if not stage:
+                return
+
+            symbol, send_time, ack_time, cancel_time = stage
+
+            if not ack_time:
+                stage[2] = ack_time = now
+                self.record("order_ack", symbol, (now - send_time) // 1000)
+
+                if create_time and self.clock and self.clock.synced:
+                    self.record("order_push", symbol, int(self.clock.get_latency(create_time) * 1000))
+
+            if filled:
+                self.record("fill", symbol, (now - ack_time) // 1000)
+
+            if status == Status.CANCELLED and cancel_time:
+                self.record("cancel", symbol, (now - cancel_time) // 1000)
+
+            if not active:
+                self.stages.pop(orderid)
+
+    def on_market_data(self, symbol: str, server_time: int) -> None:
+        """收到行情推送，server_time为交易所时间戳"""
+        if not self.clock or not self.clock.synced:
+            return
+
+        value: int = int(self.clock.get_latency(server_time) * 1000)
+        with self.lock:
+            self.record("market_data", symbol, value)
+
+    def on_response(self, path: str, start: int) -> None:
+        """REST请求完成，start为请求开始的单调时钟纳秒"""
+        value: int = (monotonic_ns() - start) // 1000
+        with self.lock:
+            self.record("http", path, value)
+
+    def get_metrics(self) -> dict:
+        """获取全部延时统计"""
+        now: float = monotonic()
+        with self.lock:
+            result: Dict[str, dict] = {}
+            for (name, key), histogram in self.histograms.items():
+                result.setdefault(name, {})[key] = histogram.get_summary(now)
+            result["pending_orders"] = len(self.stages)
+            return result
+
+
+class MetricsServer:
+    """本地HTTP指标接口，GET任意路径返回JSON格式的指标"""
+
+    def __init__(self, port: int, collect: Callable[[], dict]) -> None:
+        """构造函数"""
+        self.port: int = port
+        self.collect: Callable[[], dict] = collect
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> None:
+        """在后台线程中启动，只监听本机地址"""
+        collect: Callable[[], dict] = self.collect
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body: bytes = json.dumps(collect(), ensure_ascii=False, default=str).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """停止服务"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
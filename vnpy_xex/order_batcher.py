@@ -0,0 +1,68 @@
+from asyncio import AbstractEventLoop
+from threading import Lock
+from typing import Any, Callable, List, Set, Tuple
+
+# 批量委托条目：(batchOrder参数, 回调时使用的委托或撤单对象)
+BatchItem = Tuple[dict, Any]
+
+
+class OrderBatcher:
+    """
+    批量委托合并器
+
+    在合并窗口内收集各处调用提交的下单和撤单参数，窗口结束或数量达到上限后，
+    在事件循环中统一交给flush回调拆分发送。
+    """
+
+    def __init__(
+            self,
+            loop: AbstractEventLoop,
+            window: float,
+            batch_size: int,
+            callback: Callable[[List[BatchItem]], None]
+    ) -> None:
+        """构造函数，window单位为秒"""
+        self.loop: AbstractEventLoop = loop
+        self.window: float = window
+        self.batch_size: int = batch_size
+        self.callback: Callable[[List[BatchItem]], None] = callback
+
+        self.lock: Lock = Lock()
+        self.items: List[BatchItem] = []
+
+    def add(self, items: List[BatchItem]) -> None:
+        """添加委托条目"""
+        with self.lock:
+            first: bool = not self.items
+            self.items.extend(items)
+            full: bool = len(self.items) >= self.batch_size
+
+        # 数量达到上限立即发送，否则由窗口内第一个条目启动定时
+        if full:
+            self.loop.call_soon_threadsafe(self.flush)
+        elif first:
+            self.loop.call_soon_threadsafe(self.loop.call_later, self.window, self.flush)
+
+    def flush(self) -> None:
+        """发送当前收集的全部条目"""
+        # 持有锁直到条目交给回调，撤回下单时不会遗漏正在发出的条目
+        with self.lock:
+            items, self.items = self.items, []
+
+            if items:
+                self.callback(items)
+
+    def withdraw(self, orderids: Set[str]) -> List[BatchItem]:
+        """撤回窗口内尚未发出的下单条目"""
+        with self.lock:
+            withdrawn: List[BatchItem] = []
+            remaining: List[BatchItem] = []
+            for item in self.items:
+                param: dict = item[0]
+                if param["isCreate"] and param["clientOrderId"] in orderids:
+                    withdrawn.append(item)
+                else:
+                    remaining.append(item)
+            self.items = remaining
+
+        return withdrawn
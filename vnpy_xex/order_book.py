@@ -0,0 +1,128 @@
+from array import array
+from bisect import bisect_left
+from typing import List, Sequence
+
+from vnpy.trader.object import TickData
+
+# 推送到TickData的档位数量
+TICK_DEPTH: int = 5
+
+# 预生成的TickData档位字段名，避免每次推送时拼接字符串
+BID_PRICE_FIELDS: List[str] = [f"bid_price_{i}" for i in range(1, TICK_DEPTH + 1)]
+BID_VOLUME_FIELDS: List[str] = [f"bid_volume_{i}" for i in range(1, TICK_DEPTH + 1)]
+ASK_PRICE_FIELDS: List[str] = [f"ask_price_{i}" for i in range(1, TICK_DEPTH + 1)]
+ASK_VOLUME_FIELDS: List[str] = [f"ask_volume_{i}" for i in range(1, TICK_DEPTH + 1)]
+
+
+class BookSide:
+    """
+    盘口单边档位
+
+    价格和数量保存在预分配的定长数组中，按排序键升序排列。
+    买盘使用负价格作为排序键，从而买卖两边都可以用同一套二分查找逻辑。
+    """
+
+    __slots__ = ("keys", "sizes", "count", "capacity", "sign")
+
+    def __init__(self, capacity: int, is_bid: bool) -> None:
+        """构造函数"""
+        self.capacity: int = capacity
+        self.sign: float = -1.0 if is_bid else 1.0
+        self.keys: array = array("d", bytes(8 * capacity))
+        self.sizes: array = array("d", bytes(8 * capacity))
+        self.count: int = 0
+
+    def update(self, price: float, size: float) -> None:
+        """更新单个价格档位，数量为0时删除该档位"""
+        keys: array = self.keys
+        sizes: array = self.sizes
+        count: int = self.count
+        key: float = price * self.sign
+
+        i: int = bisect_left(keys, key, 0, count)
+
+        # 已有档位：修改或删除
+        if i < count and keys[i] == key:
+            if size:
+                sizes[i] = size
+            else:
+                keys[i:count - 1] = keys[i + 1:count]
+                sizes[i:count - 1] = sizes[i + 1:count]
+                self.count = count - 1
+            return
+
+        # 新增档位
+        if not size or i >= self.capacity:
+            return
+
+        # 数组已满时丢弃最差的一档
+        end: int = min(count, self.capacity - 1)
+        keys[i + 1:end + 1] = keys[i:end]
+        sizes[i + 1:end + 1] = sizes[i:end]
+        keys[i] = key
+        sizes[i] = size
+        self.count = end + 1
+
+    def clear(self) -> None:
+        """清空档位"""
+        self.count = 0
+
+    def price(self, i: int) -> float:
+        """第i档价格"""
+        return self.keys[i] * self.sign
+
+
+class OrderBook:
+    """基于增量推送维护的单合约盘口"""
+
+    __slots__ = ("symbol", "bids", "asks")
+
+    def __init__(self, symbol: str, capacity: int = 200) -> None:
+        """构造函数"""
+        self.symbol: str = symbol
+        self.bids: BookSide = BookSide(capacity, True)
+        self.asks: BookSide = BookSide(capacity, False)
+
+    def apply(self, bids: Sequence, asks: Sequence, snapshot: bool = False) -> None:
+        """
+        应用盘口变化
+
+        bids/asks为[[价格, 数量], ...]格式，snapshot为True时先清空盘口
+        """
+        if snapshot:
+            self.bids.clear()
+            self.asks.clear()
+
+        update = self.bids.update
+        for price, size in bids:
+            update(float(price), float(size))
+
+        update = self.asks.update
+        for price, size in asks:
+            update(float(price), float(size))
+
+    def fill_tick(self, tick: TickData) -> None:
+        """将前五档盘口写入TickData"""
+        self._fill_side(tick, self.bids, BID_PRICE_FIELDS, BID_VOLUME_FIELDS)
+        self._fill_side(tick, self.asks, ASK_PRICE_FIELDS, ASK_VOLUME_FIELDS)
+
+    @staticmethod
+    def _fill_side(
+            tick: TickData,
+            side: BookSide,
+            price_fields: List[str],
+            volume_fields: List[str]
+    ) -> None:
+        """写入单边盘口"""
+        n: int = min(side.count, TICK_DEPTH)
+        keys: array = side.keys
+        sizes: array = side.sizes
+        sign: float = side.sign
+
+        for i in range(n):
+            setattr(tick, price_fields[i], keys[i] * sign)
+            setattr(tick, volume_fields[i], sizes[i])
+
+        for i in range(n, TICK_DEPTH):
+            setattr(tick, price_fields[i], 0)
+            setattr(tick, volume_fields[i], 0)
@@ -0,0 +1,86 @@
+from asyncio import AbstractEventLoop
+from threading import Lock
+from typing import Callable, Dict, Tuple
+
+from vnpy.trader.constant import Status
+from vnpy.trader.object import OrderData
+
+
+class OrderConflator:
+    """
+    委托推送合并器
+
+    同一委托在合并窗口内的多次推送只保留最新状态，窗口结束后统一推送。
+    委托状态发生变化或累计成交量增加时立即推送，并丢弃该委托尚未推送的旧数据，
+    保证成交数据推送前已经推送了对应的委托。成交数据不经过合并器，始终立即推送。
+    """
+
+    def __init__(
+            self,
+            loop: AbstractEventLoop,
+            window: float,
+            callback: Callable[[OrderData], None]
+    ) -> None:
+        """构造函数，window单位为秒"""
+        self.loop: AbstractEventLoop = loop
+        self.window: float = window
+        self.callback: Callable[[OrderData], None] = callback
+
+        self.lock: Lock = Lock()
+        self.pending: Dict[str, OrderData] = {}
+        # 活动委托最近一次推送的状态和累计成交量，委托结束后移除
+        self.published: Dict[str, Tuple[Status, float]] = {}
+
+        # 统计指标
+        self.received: int = 0
+        self.pushed: int = 0
+
+    def update(self, order: OrderData) -> None:
+        """收到委托数据"""
+        orderid: str = order.orderid
+
+        with self.lock:
+            self.received += 1
+
+            last: Tuple[Status, float] = self.published.get(orderid, None)
+            immediate: bool = not last or last[0] != order.status or order.traded > last[1]
+            if immediate:
+                self.pending.pop(orderid, None)
+                self.publish(order)
+            else:
+                first: bool = not self.pending
+                self.pending[orderid] = order
+
+        # 由窗口内第一条缓存数据启动定时
+        if immediate:
+            self.callback(order)
+        elif first:
+            self.loop.call_soon_threadsafe(self.loop.call_later, self.window, self.flush)
+
+    def publish(self, order: OrderData) -> None:
+        """记录即将推送的委托状态和累计成交量"""
+        self.pushed += 1
+
+        if order.is_active():
+            self.published[order.orderid] = (order.status, order.traded)
+        else:
+            self.published.pop(order.orderid, None)
+
+    def flush(self) -> None:
+        """推送缓存的全部委托数据"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            for order in pending.values():
+                self.publish(order)
+
+        for order in pending.values():
+            self.callback(order)
+
+    def get_metrics(self) -> dict:
+        """获取合并统计指标"""
+        with self.lock:
+            return {
+                "received": self.received,
+                "pushed": self.pushed,
+                "pending": len(self.pending),
+            }
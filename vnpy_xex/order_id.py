@@ -0,0 +1,107 @@
+import json
+import os
+import time
+from datetime import datetime, tzinfo
+from hashlib import sha1
+from itertools import count
+from pathlib import Path
+from threading import Lock
+from typing import List
+
+from vnpy.trader.utility import get_folder_path
+
+# 时间下限中每秒预留的委托号数量，与原有的秒级时间戳乘以100万的格式保持一致
+IDS_PER_SECOND: int = 1_000_000
+
+
+class OrderIdAllocator:
+    """
+    本地委托号分配器
+
+    委托号按号段分配，每次从日志文件中预留一个号段并写回新的高水位，号段内的分配只做计数，不加锁。
+    预留时以文件锁保证同一账户的多个进程互斥，并以当前时间作为下限，日志丢失时也不会与之前的委托号重复。
+    """
+
+    def __init__(
+            self,
+            name: str,
+            block_size: int = 10_000,
+            folder_name: str = "xex_order_id",
+            lock_timeout: float = 10,
+            tz: tzinfo = None
+    ) -> None:
+        """构造函数，name用于区分账户，相同name的分配器共享同一个日志文件"""
+        self.block_size: int = block_size
+        self.lock_timeout: float = lock_timeout
+        self.tz: tzinfo = tz
+
+        folder: Path = get_folder_path(folder_name)
+        filename: str = sha1(name.encode()).hexdigest()[:16]
+        self.journal_path: Path = folder.joinpath(f"{filename}.json")
+        self.lock_path: Path = folder.joinpath(f"{filename}.lock")
+
+        self.counter: count = count()
+        self.blocks: List[int] = []
+        self.reserve_lock: Lock = Lock()
+
+    def new_id(self) -> int:
+        """分配新的委托号"""
+        # count的自增由GIL保证原子性，不同线程拿到的序号各不相同
+        n: int = next(self.counter)
+        index, offset = divmod(n, self.block_size)
+        try:
+            return self.blocks[index] + offset
+        except IndexError:
+            return self.reserve(index) + offset
+
+    def reserve(self, index: int) -> int:
+        """预留号段直到第index个号段可用，返回该号段起始值"""
+        with self.reserve_lock:
+            while len(self.blocks) <= index:
+                self.blocks.append(self.reserve_block())
+            return self.blocks[index]
+
+    def reserve_block(self) -> int:
+        """从日志文件预留一个号段"""
+        self.acquire_file_lock()
+        try:
+            high_water: int = 0
+            if self.journal_path.exists():
+                with open(self.journal_path, encoding="utf-8") as f:
+                    high_water = json.load(f)["high_water"]
+
+            floor: int = int(datetime.now(self.tz).strftime("%y%m%d%H%M%S")) * IDS_PER_SECOND
+            start: int = max(high_water, floor)
+
+            # 先写临时文件再替换，避免进程中断导致日志损坏
+            temp_path: Path = self.journal_path.with_suffix(".tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"high_water": start + self.block_size}, f)
+            os.replace(temp_path, self.journal_path)
+        finally:
+            self.release_file_lock()
+
+        return start
+
+    def acquire_file_lock(self) -> None:
+        """获取跨进程文件锁，持有锁的进程异常退出时在超时后清除锁文件"""
+        while True:
+            try:
+                fd: int = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(fd)
+                return
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) > self.lock_timeout:
+                        os.remove(self.lock_path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(0.001)
+
+    def release_file_lock(self) -> None:
+        """释放跨进程文件锁"""
+        try:
+            os.remove(self.lock_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,273 @@
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from time import monotonic
+from typing import Dict, List, Optional, Set
+
+from vnpy.trader.constant import Direction, Exchange, Offset, OrderType, Status
+from vnpy.trader.object import ACTIVE_STATUSES, OrderData
+
+
+class OrderRecord:
+    """紧凑的委托记录"""
+
+    __slots__ = (
+        "orderid",
+        "exchange_orderid",
+        "symbol",
+        "exchange",
+        "type",
+        "direction",
+        "offset",
+        "price",
+        "volume",
+        "traded",
+        "avg_price",
+        "status",
+        "datetime",
+        "reference",
+        "archived_at",
+    )
+
+    def __init__(self, order: OrderData) -> None:
+        """构造函数"""
+        self.orderid: str = order.orderid
+        self.exchange_orderid: Optional[str] = None
+        self.avg_price: float = 0
+        self.archived_at: float = 0
+        self.update(order)
+
+    def update(self, order: OrderData) -> None:
+        """使用最新委托数据更新记录"""
+        self.symbol: str = order.symbol
+        self.exchange: Exchange = order.exchange
+        self.type: OrderType = order.type
+        self.direction: Direction = order.direction
+        self.offset: Offset = order.offset
+        self.price: float = order.price
+        self.volume: float = order.volume
+        self.traded: float = order.traded
+        self.status: Status = order.status
+        self.datetime: datetime = order.datetime
+        self.reference: str = order.reference
+
+        exchange_orderid: Optional[str] = getattr(order, "origin_orderId", None)
+        if exchange_orderid is not None:
+            self.exchange_orderid = exchange_orderid
+
+        avg_price: Optional[float] = getattr(order, "avg_price", None)
+        if avg_price is not None:
+            self.avg_price = avg_price
+
+    def is_active(self) -> bool:
+        """是否为活动委托"""
+        return self.status in ACTIVE_STATUSES
+
+    def to_order(self, gateway_name: str) -> OrderData:
+        """生成OrderData"""
+        order: OrderData = OrderData(
+            gateway_name=gateway_name,
+            symbol=self.symbol,
+            exchange=self.exchange,
+            orderid=self.orderid,
+            type=self.type,
+            direction=self.direction,
+            offset=self.offset,
+            price=self.price,
+            volume=self.volume,
+            traded=self.traded,
+            status=self.status,
+            datetime=self.datetime,
+            reference=self.reference
+        )
+        if self.exchange_orderid is not None:
+            setattr(order, "origin_orderId", self.exchange_orderid)
+        setattr(order, "avg_price", self.avg_price)
+        return order
+
+
+class OrderChange:
+    """委托更新结果，记录本次提交前后的累计成交量和成交均价，新委托提交前的成交量为None"""
+
+    __slots__ = ("last_traded", "last_avg_price", "traded", "avg_price")
+
+    def __init__(self, record: Optional[OrderRecord]) -> None:
+        """构造函数，传入更新前的委托记录"""
+        self.last_traded: Optional[float] = record.traded if record else None
+        self.last_avg_price: float = record.avg_price if record else 0
+        self.traded: float = 0
+        self.avg_price: float = 0
+
+    def commit(self, record: OrderRecord) -> "OrderChange":
+        """记录更新后的委托"""
+        self.traded = record.traded
+        self.avg_price = record.avg_price
+        return self
+
+
+class OrderStore:
+    """
+    委托存储
+
+    活动委托按合约、状态和交易所委托号建立索引，
+    结束状态的委托转入按数量和时间淘汰的归档区，保证长时间运行时内存不增长。
+    """
+
+    def __init__(
+            self,
+            gateway_name: str,
+            archive_size: int = 10_000,
+            archive_age: float = 3600
+    ) -> None:
+        """构造函数，archive_age单位为秒"""
+        self.gateway_name: str = gateway_name
+        self.archive_size: int = archive_size
+        self.archive_age: float = archive_age
+
+        self.lock: Lock = Lock()
+
+        self.active: Dict[str, OrderRecord] = {}
+        self.archive: "OrderedDict[str, OrderRecord]" = OrderedDict()
+
+        self.symbol_index: Dict[str, Set[str]] = {}
+        self.status_index: Dict[Status, Set[str]] = {status: set() for status in ACTIVE_STATUSES}
+        self.exchange_index: Dict[str, str] = {}
+
+    def update(self, order: OrderData) -> Optional[OrderChange]:
+        """
+        更新委托并返回提交前后的成交变化
+
+        成交量回退的乱序推送和已归档委托的过期推送被忽略并返回None，
+        本地拒单后交易所的活动推送恢复委托。成交变化在锁内记录，多个线程同时更新时不会重复计算成交。
+        """
+        orderid: str = order.orderid
+
+        with self.lock:
+            record: OrderRecord = self.active.get(orderid, None)
+            if record is None:
+                record = self.archive.get(orderid, None)
+
+            if record and order.traded < record.traded:
+                return None
+            change: OrderChange = OrderChange(record)
+
+            if record and record.is_active():
+                self.status_index[record.status].discard(orderid)
+                record.update(order)
+            else:
+                if record and self._is_revived(record, order):
+                    # 本地判定拒单的委托实际已被交易所接受，恢复为活动委托
+                    self.archive.pop(orderid)
+                    record.update(order)
+                    self.active[orderid] = record
+                    self.symbol_index.setdefault(record.symbol, set()).add(orderid)
+                elif record:
+                    # 已归档委托只接受结束状态推送，其余为乱序到达的过期数据
+                    if order.status in ACTIVE_STATUSES:
+                        return None
+
+                    record.update(order)
+                    self._index_exchange_orderid(record)
+                    return change.commit(record)
+                else:
+                    record = OrderRecord(order)
+                    self.active[orderid] = record
+                    self.symbol_index.setdefault(record.symbol, set()).add(orderid)
+
+            self._index_exchange_orderid(record)
+
+            if record.is_active():
+                self.status_index[record.status].add(orderid)
+            else:
+                self._archive(record)
+
+            return change.commit(record)
+
+    def get(self, orderid: str) -> Optional[OrderRecord]:
+        """查询委托记录"""
+        record: OrderRecord = self.active.get(orderid, None)
+        if record is None:
+            record = self.archive.get(orderid, None)
+        return record
+
+    def get_order(self, orderid: str) -> Optional[OrderData]:
+        """查询委托数据"""
+        record: OrderRecord = self.get(orderid)
+        if record is None:
+            return None
+        return record.to_order(self.gateway_name)
+
+    def get_by_exchange_orderid(self, exchange_orderid: str) -> Optional[OrderRecord]:
+        """通过交易所委托号查询委托记录"""
+        orderid: str = self.exchange_index.get(exchange_orderid, None)
+        if orderid is None:
+            return None
+        return self.get(orderid)
+
+    def get_active_orderids(self, symbol: str = None) -> List[str]:
+        """查询活动委托号，可以指定合约"""
+        with self.lock:
+            if symbol is None:
+                return list(self.active)
+            return list(self.symbol_index.get(symbol, ()))
+
+    def get_active_records(self, symbol: str = None) -> List[OrderRecord]:
+        """查询活动委托记录，可以指定合约"""
+        with self.lock:
+            if symbol is None:
+                return list(self.active.values())
+            return [self.active[orderid] for orderid in self.symbol_index.get(symbol, ())]
+
+    def get_status_orderids(self, status: Status) -> List[str]:
+        """查询指定状态的活动委托号"""
+        with self.lock:
+            return list(self.status_index.get(status, ()))
+
+    def get_active_symbols(self) -> List[str]:
+        """查询有活动委托的合约"""
+        with self.lock:
+            return list(self.symbol_index)
+
+    @staticmethod
+    def _is_revived(record: OrderRecord, order: OrderData) -> bool:
+        """
+        是否为本地拒单后交易所的活动推送
+
+        下单请求超时、连接中断或返回5xx时委托在本地被拒单，但交易所可能已经接受。
+        此类委托没有交易所委托号，之后收到带交易所委托号的活动推送时应恢复跟踪。
+        """
+        return (
+            record.status == Status.REJECTED
+            and record.exchange_orderid is None
+            and order.status in ACTIVE_STATUSES
+            and getattr(order, "origin_orderId", None) is not None
+        )
+
+    def _index_exchange_orderid(self, record: OrderRecord) -> None:
+        """记录交易所委托号索引"""
+        if record.exchange_orderid is not None:
+            self.exchange_index[record.exchange_orderid] = record.orderid
+
+    def _archive(self, record: OrderRecord) -> None:
+        """将结束委托移入归档区，并淘汰超限的归档委托"""
+        orderid: str = record.orderid
+        self.active.pop(orderid)
+
+        orderids: Set[str] = self.symbol_index[record.symbol]
+        orderids.discard(orderid)
+        if not orderids:
+            self.symbol_index.pop(record.symbol)
+
+        now: float = monotonic()
+        record.archived_at = now
+        self.archive[orderid] = record
+
+        expire_time: float = now - self.archive_age
+        while self.archive:
+            oldest: OrderRecord = next(iter(self.archive.values()))
+            if len(self.archive) <= self.archive_size and oldest.archived_at > expire_time:
+                break
+
+            self.archive.popitem(last=False)
+            if oldest.exchange_orderid is not None:
+                self.exchange_index.pop(oldest.exchange_orderid, None)
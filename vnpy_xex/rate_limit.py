@@ -0,0 +1,147 @@
+from enum import IntEnum
+from heapq import heappop, heappush
+from itertools import count
+from threading import Condition, Thread
+from time import monotonic
+from typing import Callable, Dict, List, Tuple
+
+
+class Priority(IntEnum):
+    """请求优先级，数值越小越优先"""
+    CANCEL = 0
+    ORDER = 1
+    QUERY = 2
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    __slots__ = ("rate", "capacity", "tokens", "last")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """构造函数，rate为每秒补充的令牌数"""
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self.tokens: float = capacity
+        self.last: float = monotonic()
+
+    def consume(self, weight: float, now: float) -> float:
+        """尝试消耗令牌，成功返回0，否则返回需要等待的秒数"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+        weight = min(weight, self.capacity)
+        if self.tokens >= weight:
+            self.tokens -= weight
+            return 0
+        return (weight - self.tokens) / self.rate
+
+
+class RequestScheduler:
+    """
+    REST请求限速调度器
+
+    令牌充足且没有排队请求时直接在调用线程发送，
+    否则进入优先级队列，由后台线程按撤单、下单、查询的顺序在令牌可用时发送。
+    停止时队列中的请求默认按优先级立即发送，也可以选择放弃并返回各优先级放弃的数量。
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """构造函数"""
+        self.bucket: TokenBucket = TokenBucket(rate, capacity)
+
+        self.condition: Condition = Condition()
+        self.queue: List[Tuple[Priority, int, float, float, Callable[[], None]]] = []
+        self.count = count()
+
+        self.active: bool = False
+        self.thread: Thread = None
+
+        # 监控指标
+        self.depths: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self.dispatched: int = 0
+        self.throttled: int = 0
+        self.total_wait: float = 0
+        self.max_wait: float = 0
+
+    def start(self) -> None:
+        """启动调度线程"""
+        if self.active:
+            return
+
+        self.active = True
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self, drain: bool = True) -> Dict[Priority, int]:
+        """停止调度线程，drain为True时立即发送队列中剩余的请求，否则放弃并返回各优先级的数量"""
+        with self.condition:
+            self.active = False
+            queue, self.queue = self.queue, []
+            depths, self.depths = self.depths, {priority: 0 for priority in Priority}
+            if drain:
+                self.dispatched += len(queue)
+            self.condition.notify_all()
+
+        if not drain:
+            return {priority: depth for priority, depth in depths.items() if depth}
+
+        queue.sort()
+        for entry in queue:
+            entry[-1]()
+        return {}
+
+    def submit(self, priority: Priority, weight: float, func: Callable[[], None]) -> None:
+        """提交请求发送函数"""
+        with self.condition:
+            immediate: bool = not self.queue and not self.bucket.consume(weight, monotonic())
+            if immediate:
+                self.dispatched += 1
+            else:
+                heappush(self.queue, (priority, next(self.count), weight, monotonic(), func))
+                self.depths[priority] += 1
+                self.throttled += 1
+                self.condition.notify()
+
+        if immediate:
+            func()
+
+    def run(self) -> None:
+        """按优先级发送排队请求"""
+        while True:
+            with self.condition:
+                while self.active and not self.queue:
+                    self.condition.wait()
+
+                if not self.active:
+                    return
+
+                priority, _, weight, submit_time, func = self.queue[0]
+                now: float = monotonic()
+                wait: float = self.bucket.consume(weight, now)
+                if wait:
+                    # 等待期间可能有更高优先级的请求加入，因此醒来后重新检查队首
+                    self.condition.wait(wait)
+                    continue
+
+                heappop(self.queue)
+                self.depths[priority] -= 1
+                self.dispatched += 1
+
+                waited: float = now - submit_time
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+            func()
+
+    def get_metrics(self) -> dict:
+        """获取队列深度和限速指标"""
+        with self.condition:
+            return {
+                "queue_depth": {priority.name: depth for priority, depth in self.depths.items()},
+                "dispatched": self.dispatched,
+                "throttled": self.throttled,
+                "avg_wait": self.total_wait / self.throttled if self.throttled else 0,
+                "max_wait": self.max_wait,
+                "tokens": self.bucket.tokens,
+            }
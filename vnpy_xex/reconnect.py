@@ -0,0 +1,92 @@
+from random import uniform
+from time import monotonic
+
+
+class ReconnectSupervisor:
+    """
+    断线重连管理
+
+    按带随机抖动的指数退避计算重连等待时间，连接稳定一段时间后重置退避，
+    并统计断线时长和重连后补齐数据的耗时。
+    """
+
+    def __init__(
+            self,
+            base_delay: float = 1,
+            max_delay: float = 60,
+            factor: float = 2,
+            stable_time: float = 30
+    ) -> None:
+        """构造函数，时间单位均为秒"""
+        self.base_delay: float = base_delay
+        self.max_delay: float = max_delay
+        self.factor: float = factor
+        self.stable_time: float = stable_time
+
+        self.attempts: int = 0
+        self.connected_at: float = 0
+        self.disconnected_at: float = 0
+
+        # 统计指标
+        self.reconnect_count: int = 0
+        self.last_gap: float = 0
+        self.max_gap: float = 0
+        self.total_gap: float = 0
+        self.resync_count: int = 0
+        self.last_resync_cost: float = 0
+        self.last_resync_symbols: int = 0
+
+    def next_delay(self) -> float:
+        """下一次重连前的等待时间，取退避时间的一半加上随机抖动"""
+        delay: float = min(self.max_delay, self.base_delay * self.factor ** self.attempts)
+        self.attempts += 1
+        return delay / 2 + uniform(0, delay / 2)
+
+    def on_connected(self) -> float:
+        """连接成功，返回本次断线时长，首次连接返回0"""
+        now: float = monotonic()
+        self.connected_at = now
+
+        if not self.disconnected_at:
+            return 0
+
+        gap: float = now - self.disconnected_at
+        self.disconnected_at = 0
+
+        self.reconnect_count += 1
+        self.last_gap = gap
+        self.max_gap = max(self.max_gap, gap)
+        self.total_gap += gap
+        return gap
+
+    def on_disconnected(self) -> None:
+        """连接断开或连接失败"""
+        now: float = monotonic()
+
+        # 连接已稳定运行足够长时间，重置退避
+        if self.connected_at and now - self.connected_at >= self.stable_time:
+            self.attempts = 0
+        self.connected_at = 0
+
+        # 连续失败时保留第一次断开的时间
+        if not self.disconnected_at:
+            self.disconnected_at = now
+
+    def on_resync(self, cost: float, symbols: int) -> None:
+        """记录重连后补齐数据的耗时"""
+        self.resync_count += 1
+        self.last_resync_cost = cost
+        self.last_resync_symbols = symbols
+
+    def get_metrics(self) -> dict:
+        """获取重连统计指标"""
+        return {
+            "reconnect_count": self.reconnect_count,
+            "attempts": self.attempts,
+            "last_gap": self.last_gap,
+            "max_gap": self.max_gap,
+            "total_gap": self.total_gap,
+            "resync_count": self.resync_count,
+            "last_resync_cost": self.last_resync_cost,
+            "last_resync_symbols": self.last_resync_symbols,
+        }
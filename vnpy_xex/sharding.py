@@ -0,0 +1,376 @@
+"""
+多账户多进程模式
+
+每个账户在独立的工作进程中运行一个XEXSpotGateway，主进程中的XEXSpotShardGateway作为代理，
+通过管道转发下单、撤单等调用，并把工作进程推送的事件交还给主进程的事件引擎。
+合约信息由主进程查询一次后写入合约表文件，工作进程以内存映射方式只读加载。
+
+在MainEngine中为每个账户添加一个网关即可：
+
+    main_engine.add_gateway(XEXSpotShardGateway, "XEX_SPOT_1")
+    main_engine.add_gateway(XEXSpotShardGateway, "XEX_SPOT_2")
+"""
+import os
+import time
+from itertools import count
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+import requests
+from vnpy.event import Event, EventEngine
+from vnpy.trader.event import (
+    EVENT_ACCOUNT,
+    EVENT_CONTRACT,
+    EVENT_LOG,
+    EVENT_ORDER,
+    EVENT_POSITION,
+    EVENT_QUOTE,
+    EVENT_TICK,
+    EVENT_TRADE
+)
+from vnpy.trader.gateway import BaseGateway
+from vnpy.trader.object import BarData, CancelRequest, HistoryRequest, OrderRequest, SubscribeRequest
+from vnpy.trader.utility import get_folder_path, load_json
+
+from . import xex_gateway
+from .bar_array import BarArray
+from .contract_table import save_contract_table
+from .reconnect import ReconnectSupervisor
+from .xex_gateway import CONTRACT_CACHE_FILE, XEXSpotGateway
+
+# 需要转发的基础事件，带vt_symbol、vt_orderid等后缀的事件由主进程代理网关重新生成
+BASE_EVENTS: Tuple[str, ...] = (
+    EVENT_TICK,
+    EVENT_TRADE,
+    EVENT_ORDER,
+    EVENT_POSITION,
+    EVENT_ACCOUNT,
+    EVENT_QUOTE,
+    EVENT_CONTRACT,
+    EVENT_LOG,
+)
+
+# 合约表文件
+CONTRACT_TABLE_NAME: str = "xex_contract_table.npy"
+
+# 等待工作进程响应调用的超时时间（秒）
+CALL_TIMEOUT: float = 30
+
+contract_table_lock: Lock = Lock()
+contract_table_path: Path = None
+
+# 各代理网关的工作进程已占用的指标端口
+metrics_ports_lock: Lock = Lock()
+metrics_ports: Set[int] = set()
+
+
+def query_contracts() -> Dict[str, dict]:
+    """查询交易所合约信息，失败时使用本地合约信息缓存"""
+    try:
+        data: dict = requests.get(f"{xex_gateway.BASE_URL}v1/exchangeInfo", timeout=10).json()
+    except (requests.RequestException, ValueError):
+        return load_json(CONTRACT_CACHE_FILE)
+
+    if data.get("code") != 0:
+        return load_json(CONTRACT_CACHE_FILE)
+
+    contracts: Dict[str, dict] = {}
+    for d in data["data"]["pairs"]:
+        if d["state"] == 1:
+            contracts[d["symbol"]] = {
+                "name": f"{d['sellCoin'].upper()}/{d['buyCoin'].upper()}",
+                "pricetick": float(d["minStepPrice"]),
+                "min_volume": float(d["minQty"]),
+            }
+    return contracts
+
+
+def get_contract_table() -> Path:
+    """获取主进程共享的合约表文件，首次调用时查询并写入"""
+    global contract_table_path
+
+    with contract_table_lock:
+        if contract_table_path is None:
+            path: Path = get_folder_path("xex_shard").joinpath(CONTRACT_TABLE_NAME)
+            save_contract_table(path, query_contracts())
+            contract_table_path = path
+
+    return contract_table_path
+
+
+class ForwardEventEngine(EventEngine):
+    """工作进程中使用的事件引擎，将基础事件通过管道发送给主进程"""
+
+    def __init__(self, conn: Connection) -> None:
+        """构造函数"""
+        super().__init__()
+
+        self.conn: Connection = conn
+        self.lock: Lock = Lock()
+
+    def put(self, event: Event) -> None:
+        """转发事件"""
+        event_type: str = event.type
+        if event_type not in BASE_EVENTS and event_type.startswith(BASE_EVENTS):
+            return
+
+        with self.lock:
+            self.conn.send((event_type, event.data))
+
+
+def run_worker(
+        gateway_name: str,
+        setting: dict,
+        table_path: str,
+        event_conn: Connection,
+        command_conn: Connection
+) -> None:
+    """工作进程入口，运行网关并执行主进程发来的调用"""
+    xex_gateway.CONTRACT_TABLE_FILE = table_path
+
+    event_engine: ForwardEventEngine = ForwardEventEngine(event_conn)
+    gateway: XEXSpotGateway = XEXSpotGateway(event_engine, gateway_name)
+    gateway.connect(setting)
+
+    while True:
+        try:
+            seq, method, args, reply = command_conn.recv()
+        except EOFError:
+            break
+
+        if method == "close":
+            break
+
+        try:
+            result: Any = getattr(gateway, method)(*args)
+        except Exception as e:
+            gateway.write_log(f"{method}调用失败：{e!r}")
+            result = None
+
+        if reply:
+            command_conn.send((seq, result))
+
+    gateway.close()
+    os._exit(0)
+
+
+class XEXSpotShardGateway(BaseGateway):
+    """
+    XEX现货多进程代理网关
+
+    连接时启动运行XEXSpotGateway的工作进程，工作进程意外退出时按退避时间自动重启。
+    """
+
+    default_name: str = "XEX_SPOT"
+
+    default_setting: Dict[str, Any] = dict(XEXSpotGateway.default_setting)
+
+    exchanges: list = XEXSpotGateway.exchanges
+
+    def __init__(self, event_engine: EventEngine, gateway_name: str) -> None:
+        """构造函数"""
+        super().__init__(event_engine, gateway_name)
+
+        self.context: BaseContext = get_context("spawn")
+        self.process: BaseProcess = None
+        self.event_conn: Connection = None
+        self.command_conn: Connection = None
+        self.command_lock: Lock = Lock()
+        self.command_count = count(1)
+
+        self.setting: dict = {}
+        self.metrics_port: int = 0
+        self.active: bool = False
+        self.supervisor: ReconnectSupervisor = ReconnectSupervisor()
+
+        self.handlers: Dict[str, Callable[[Any], None]] = {
+            EVENT_TICK: self.on_tick,
+            EVENT_TRADE: self.on_trade,
+            EVENT_ORDER: self.on_order,
+            EVENT_POSITION: self.on_position,
+            EVENT_ACCOUNT: self.on_account,
+            EVENT_QUOTE: self.on_quote,
+            EVENT_CONTRACT: self.on_contract,
+            EVENT_LOG: self.on_log,
+        }
+
+    def connect(self, setting: dict) -> None:
+        """启动工作进程"""
+        self.setting = self.get_worker_setting(setting)
+        self.active = True
+        self.start_worker()
+
+    def get_worker_setting(self, setting: dict) -> dict:
+        """生成工作进程配置，录制文件和指标端口按网关区分，避免多个工作进程互相冲突"""
+        setting = dict(setting)
+
+        journal_path: str = setting.get("录制文件", "")
+        if journal_path:
+            path: Path = Path(journal_path)
+            setting["录制文件"] = str(path.with_name(f"{path.stem}_{self.gateway_name}{path.suffix}"))
+            self.write_log(f"录制文件：{setting['录制文件']}")
+
+        self.release_metrics_port()
+
+        port: int = setting.get("指标端口", 0)
+        if port:
+            with metrics_ports_lock:
+                while port in metrics_ports:
+                    port += 1
+                metrics_ports.add(port)
+
+            self.metrics_port = port
+            setting["指标端口"] = port
+            self.write_log(f"指标端口：{port}")
+
+        return setting
+
+    def release_metrics_port(self) -> None:
+        """释放占用的指标端口"""
+        with metrics_ports_lock:
+            metrics_ports.discard(self.metrics_port)
+        self.metrics_port = 0
+
+    def start_worker(self) -> None:
+        """启动工作进程和事件接收线程"""
+        event_reader, event_writer = self.context.Pipe(duplex=False)
+        self.command_conn, worker_command_conn = self.context.Pipe()
+        self.event_conn = event_reader
+
+        self.process = self.context.Process(
+            target=run_worker,
+            args=(
+                self.gateway_name,
+                self.setting,
+                str(get_contract_table()),
+                event_writer,
+                worker_command_conn
+            ),
+            daemon=True
+        )
+        self.process.start()
+        self.supervisor.on_connected()
+
+        # 关闭主进程持有的子进程端，子进程退出后读取端才能收到EOF
+        event_writer.close()
+        worker_command_conn.close()
+
+        Thread(target=self.receive_events, args=(event_reader,), daemon=True).start()
+
+    def receive_events(self, conn: Connection) -> None:
+        """接收工作进程推送的事件"""
+        while True:
+            try:
+                event_type, data = conn.recv()
+            except (EOFError, OSError):
+                break
+
+            handler: Callable[[Any], None] = self.handlers.get(event_type, None)
+            if handler:
+                handler(data)
+            else:
+                self.event_engine.put(Event(event_type, data))
+
+        conn.close()
+        if not self.active:
+            return
+
+        # 工作进程意外退出，等待后重启
+        self.supervisor.on_disconnected()
+        delay: float = self.supervisor.next_delay()
+        self.write_log(f"工作进程已退出，{delay:.1f}秒后重启")
+        time.sleep(delay)
+
+        if self.active:
+            self.start_worker()
+
+    def call(self, method: str, *args: Any, timeout: float = CALL_TIMEOUT) -> Any:
+        """
+        调用工作进程中网关的方法并等待返回，timeout为None时一直等待
+
+        每次调用带有序号，超时调用的返回稍后才到达时按序号丢弃，不会被当作下一次调用的结果。
+        """
+        with self.command_lock:
+            seq: int = next(self.command_count)
+            deadline: float = None if timeout is None else time.monotonic() + timeout
+
+            try:
+                self.command_conn.send((seq, method, args, True))
+
+                while True:
+                    remaining: float = None if deadline is None else max(deadline - time.monotonic(), 0)
+                    if not self.command_conn.poll(remaining):
+                        self.write_log(f"{method}调用超时")
+                        return None
+
+                    reply_seq, result = self.command_conn.recv()
+                    if reply_seq == seq:
+                        return result
+            except (EOFError, OSError):
+                self.write_log(f"{method}调用失败，工作进程不可用")
+                return None
+
+    def cast(self, method: str, *args: Any) -> None:
+        """调用工作进程中网关的方法，不等待返回"""
+        with self.command_lock:
+            try:
+                self.command_conn.send((next(self.command_count), method, args, False))
+            except OSError:
+                self.write_log(f"{method}调用失败，工作进程不可用")
+
+    def send_order(self, *reqs: OrderRequest) -> str:
+        """委托下单，调用超时时委托可能已发出，状态以工作进程后续推送为准"""
+        result: Any = self.call("send_order", *reqs)
+        if result is None:
+            self.write_log("下单未获得委托号，委托状态以后续推送为准")
+            return ""
+        return result
+
+    def cancel_order(self, *reqs: CancelRequest) -> None:
+        """委托撤单"""
+        self.cast("cancel_order", *reqs)
+
+    def cancel_all(self, symbol: str = None) -> List[str]:
+        """撤销全部活动委托，可以指定合约"""
+        return self.call("cancel_all", symbol) or []
+
+    def subscribe(self, req: SubscribeRequest) -> None:
+        """订阅行情"""
+        self.cast("subscribe", req)
+
+    def query_account(self) -> None:
+        """查询资金"""
+        pass
+
+    def query_position(self) -> None:
+        """查询持仓"""
+        pass
+
+    def query_history(self, req: HistoryRequest) -> List[BarData]:
+        """查询历史数据"""
+        return self.call("query_history", req, timeout=None) or []
+
+    def query_history_array(self, req: HistoryRequest) -> BarArray:
+        """查询列式历史数据"""
+        result: BarArray = self.call("query_history_array", req, timeout=None)
+        if result is None:
+            return BarArray(req.symbol, req.exchange, req.interval, self.gateway_name)
+        return result
+
+    def close(self) -> None:
+        """关闭工作进程"""
+        if not self.active:
+            return
+        self.active = False
+
+        self.cast("close")
+        self.process.join(10)
+        if self.process.is_alive():
+            self.process.terminate()
+
+        self.release_metrics_port()
@@ -0,0 +1,429 @@
+"""
+XEX交易所本地模拟服务器
+
+实现网关使用的REST接口和/websocket账户推送，用于离线压力测试：
+
+    python -m vnpy_xex.simulator --port 8069 --latency 0.005 --fill immediate
+
+在同一进程中使用时，调用use_simulator将网关的服务器地址指向模拟服务器，
+也可以通过XEX_BASE_URL、XEX_WEBSOCKET_HOST和XEX_DATA_WEBSOCKET_HOST环境变量指定。
+"""
+import asyncio
+import json
+import random
+import time
+from argparse import ArgumentParser
+from itertools import count
+from threading import Thread
+from typing import Dict, List, Optional, Set
+
+from aiohttp import WSMsgType, web
+
+# 默认模拟合约
+DEFAULT_PAIRS: List[dict] = [
+    {"symbol": "btc_usdt", "sellCoin": "btc", "buyCoin": "usdt", "minStepPrice": 0.01, "minQty": 0.0001, "state": 1},
+    {"symbol": "eth_usdt", "sellCoin": "eth", "buyCoin": "usdt", "minStepPrice": 0.01, "minQty": 0.001, "state": 1},
+    {"symbol": "ltc_usdt", "sellCoin": "ltc", "buyCoin": "usdt", "minStepPrice": 0.01, "minQty": 0.01, "state": 1},
+]
+
+# 委托状态编码
+STATE_NEW: int = 1
+STATE_PARTIALLY_FILLED: int = 2
+STATE_FILLED: int = 3
+STATE_CANCELED: int = 4
+
+STATE_NAMES: Dict[int, str] = {
+    STATE_NEW: "NEW",
+    STATE_PARTIALLY_FILLED: "PARTIALLY_FILLED",
+    STATE_FILLED: "FILLED",
+    STATE_CANCELED: "CANCELED",
+}
+
+# 成交模式
+FILL_NONE: str = "none"
+FILL_IMMEDIATE: str = "immediate"
+FILL_PARTIAL: str = "partial"
+
+
+class SimOrder:
+    """模拟委托"""
+
+    __slots__ = ("order_id", "client_order_id", "symbol", "direction", "order_type",
+                 "price", "volume", "traded", "state", "create_time")
+
+    def __init__(self, order_id: str, param: dict) -> None:
+        """构造函数"""
+        self.order_id: str = order_id
+        self.client_order_id: str = param["clientOrderId"]
+        self.symbol: str = param["symbol"]
+        self.direction: str = param["direction"]
+        self.order_type: str = param["tradeType"]
+        self.price: float = float(param["price"])
+        self.volume: float = float(param["totalAmount"])
+        self.traded: float = 0
+        self.state: int = STATE_NEW
+        self.create_time: int = int(time.time() * 1000)
+
+    def to_push(self) -> dict:
+        """生成uOrder推送"""
+        return {
+            "resType": "uOrder",
+            "data": {
+                "avgPrice": str(self.price if self.traded else 0),
+                "clientOrderId": self.client_order_id,
+                "createTime": self.create_time,
+                "dealQty": str(self.traded),
+                "direction": 1 if self.direction == "BUY" else 2,
+                "orderId": self.order_id,
+                "orderType": 1 if self.order_type == "LIMIT" else 2,
+                "origQty": str(self.volume),
+                "price": str(self.price),
+                "state": self.state,
+                "symbol": self.symbol,
+            }
+        }
+
+    def to_rest(self) -> dict:
+        """生成listUnfinished数据"""
+        return {
+            "orderId": self.order_id,
+            "clientOrderId": self.client_order_id,
+            "symbol": self.symbol,
+            "price": str(self.price),
+            "origQty": str(self.volume),
+            "orderType": self.order_type,
+            "orderSide": self.direction,
+            "executedQty": str(self.traded),
+            "avgPrice": str(self.price if self.traded else 0),
+            "state": STATE_NAMES[self.state],
+            "createdTime": self.create_time,
+        }
+
+
+class XEXSimulator:
+    """XEX交易所模拟服务器"""
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 8069,
+            latency: float = 0,
+            fill_mode: str = FILL_IMMEDIATE,
+            error_rate: float = 0,
+            reject_rate: float = 0,
+            item_reject_rate: float = 0,
+            pairs: List[dict] = None,
+            balances: Dict[str, float] = None
+    ) -> None:
+        """
+        构造函数
+
+        latency: 每个请求和推送的附加延时（秒）
+        fill_mode: 成交模式，none不成交，immediate立即全部成交，partial分两次成交
+        error_rate: REST请求返回HTTP 500的概率
+        reject_rate: 批量委托返回错误码的概率
+        item_reject_rate: 批量委托整体成功时单条委托返回错误码的概率
+        """
+        self.host: str = host
+        self.port: int = port
+        self.latency: float = latency
+        self.fill_mode: str = fill_mode
+        self.error_rate: float = error_rate
+        self.reject_rate: float = reject_rate
+        self.item_reject_rate: float = item_reject_rate
+
+        self.pairs: List[dict] = pairs or DEFAULT_PAIRS
+        self.balances: Dict[str, float] = balances or {"usdt": 1_000_000, "btc": 100, "eth": 1000, "ltc": 10_000}
+        self.frozen: Dict[str, float] = {coin: 0 for coin in self.balances}
+
+        self.orders: Dict[str, SimOrder] = {}
+        self.order_id_count = count(233662556898590912)
+
+        self.tokens: Set[str] = set()
+        self.clients: Set[web.WebSocketResponse] = set()
+        self.sockets: Set[web.WebSocketResponse] = set()
+
+        self.request_count: int = 0
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.runner: Optional[web.AppRunner] = None
+        self.thread: Optional[Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """REST根地址"""
+        return f"http://{self.host}:{self.port}/spot/"
+
+    @property
+    def websocket_host(self) -> str:
+        """Websocket地址"""
+        return f"ws://{self.host}:{self.port}/websocket"
+
+    def create_app(self) -> web.Application:
+        """创建web应用"""
+        app: web.Application = web.Application(middlewares=[self.fault_middleware])
+        app.router.add_get("/spot/v1/exchangeInfo", self.on_exchange_info)
+        app.router.add_get("/spot/v1/public/time", self.on_time)
+        app.router.add_get("/spot/v1/u/wallet/list", self.on_wallet_list)
+        app.router.add_post("/spot/v1/trade/order/batchOrder", self.on_batch_order)
+        app.router.add_get("/spot/v1/trade/order/listUnfinished", self.on_list_unfinished)
+        app.router.add_get("/spot/v1/trade/order/detail", self.on_order_detail)
+        app.router.add_get("/spot/v1/u/ws/token", self.on_ws_token)
+        app.router.add_get("/websocket", self.on_websocket)
+        return app
+
+    @web.middleware
+    async def fault_middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        """模拟网络延时和服务器错误"""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if request.path != "/websocket":
+            self.request_count += 1
+            if self.error_rate and random.random() < self.error_rate:
+                return web.Response(status=500, text="simulated server error")
+
+        return await handler(request)
+
+    async def on_exchange_info(self, request: web.Request) -> web.Response:
+        """合约信息"""
+        return web.json_response({"code": 0, "data": {"pairs": self.pairs}})
+
+    async def on_time(self, request: web.Request) -> web.Response:
+        """服务器时间"""
+        return web.json_response({"code": 0, "data": int(time.time() * 1000)})
+
+    async def on_wallet_list(self, request: web.Request) -> web.Response:
+        """资金信息"""
+        data: List[dict] = [
+            {"coin": coin, "balance": str(balance), "freeze": str(self.frozen[coin])}
+            for coin, balance in self.balances.items()
+        ]
+        return web.json_response({"code": 0, "data": data})
+
+    async def on_ws_token(self, request: web.Request) -> web.Response:
+        """生成ws token"""
+        token: str = f"token{len(self.tokens)}"
+        self.tokens.add(token)
+        return web.json_response({"code": 0, "data": token})
+
+    async def on_list_unfinished(self, request: web.Request) -> web.Response:
+        """查询未完成委托"""
+        symbol: str = request.query.get("symbol", None)
+        direction: str = request.query.get("direction", None)
+
+        data: List[dict] = [
+            order.to_rest() for order in self.orders.values()
+            if order.state in (STATE_NEW, STATE_PARTIALLY_FILLED)
+            and (not symbol or order.symbol == symbol)
+            and (not direction or order.direction == direction)
+        ]
+        return web.json_response({"code": 0, "data": data})
+
+    async def on_order_detail(self, request: web.Request) -> web.Response:
+        """查询单个委托"""
+        order: SimOrder = self.orders.get(request.query.get("clientOrderId", ""), None)
+        if not order:
+            return web.json_response({"code": 1004, "msg": "order not found"})
+        return web.json_response({"code": 0, "data": order.to_rest()})
+
+    async def on_batch_order(self, request: web.Request) -> web.Response:
+        """批量下单和撤单"""
+        if self.reject_rate and random.random() < self.reject_rate:
+            return web.json_response({"code": 1001, "msg": "simulated reject"})
+
+        params: List[dict] = json.loads(request.query["list"])
+        result: List[dict] = []
+        pushes: List[dict] = []
+
+        for param in params:
+            if self.item_reject_rate and random.random() < self.item_reject_rate:
+                result.append({"clientOrderId": param["clientOrderId"], "code": 1001, "msg": "simulated item reject"})
+            elif param["isCreate"]:
+                order: SimOrder = SimOrder(str(next(self.order_id_count)), param)
+                self.orders[order.client_order_id] = order
+                self.freeze(order)
+                pushes.append(order.to_push())
+                result.append({"clientOrderId": order.client_order_id, "orderId": order.order_id})
+            else:
+                order = self.orders.get(param["clientOrderId"], None)
+                if order and order.state in (STATE_NEW, STATE_PARTIALLY_FILLED):
+                    order.state = STATE_CANCELED
+                    self.unfreeze(order, order.volume - order.traded)
+                    pushes.append(order.to_push())
+                    pushes.append(self.balance_push(self.frozen_coin(order)))
+                result.append({"clientOrderId": param["clientOrderId"]})
+
+        asyncio.ensure_future(self.push_orders(pushes))
+        return web.json_response({"code": 0, "data": result})
+
+    async def push_orders(self, pushes: List[dict]) -> None:
+        """推送委托更新，并按成交模式撮合"""
+        for packet in pushes:
+            await self.broadcast(packet)
+
+        if self.fill_mode == FILL_NONE:
+            return
+
+        for packet in pushes:
+            if packet["resType"] != "uOrder" or packet["data"]["state"] != STATE_NEW:
+                continue
+
+            order: SimOrder = self.orders[packet["data"]["clientOrderId"]]
+            if self.fill_mode == FILL_PARTIAL:
+                await self.fill(order, order.volume / 2)
+            await self.fill(order, order.volume - order.traded)
+
+    async def fill(self, order: SimOrder, volume: float) -> None:
+        """委托成交"""
+        if order.state not in (STATE_NEW, STATE_PARTIALLY_FILLED) or volume <= 0:
+            return
+
+        order.traded += volume
+        order.state = STATE_FILLED if order.traded >= order.volume else STATE_PARTIALLY_FILLED
+
+        base, quote = order.symbol.split("_")
+        self.unfreeze(order, volume)
+        if order.direction == "BUY":
+            self.balances[quote] -= volume * order.price
+            self.balances[base] = self.balances.get(base, 0) + volume
+        else:
+            self.balances[base] -= volume
+            self.balances[quote] = self.balances.get(quote, 0) + volume * order.price
+
+        await self.broadcast(order.to_push())
+        await self.broadcast(self.balance_push(base))
+        await self.broadcast(self.balance_push(quote))
+
+    def frozen_coin(self, order: SimOrder) -> str:
+        """委托冻结的币种"""
+        base, quote = order.symbol.split("_")
+        return quote if order.direction == "BUY" else base
+
+    def freeze(self, order: SimOrder) -> None:
+        """冻结委托资金"""
+        coin: str = self.frozen_coin(order)
+        amount: float = order.volume * order.price if order.direction == "BUY" else order.volume
+        self.frozen[coin] = self.frozen.get(coin, 0) + amount
+
+    def unfreeze(self, order: SimOrder, volume: float) -> None:
+        """解冻委托资金"""
+        coin: str = self.frozen_coin(order)
+        amount: float = volume * order.price if order.direction == "BUY" else volume
+        self.frozen[coin] = max(self.frozen.get(coin, 0) - amount, 0)
+
+    def balance_push(self, coin: str) -> dict:
+        """生成uBalance推送"""
+        balance: float = self.balances.get(coin, 0)
+        frozen: float = self.frozen.get(coin, 0)
+        return {
+            "resType": "uBalance",
+            "data": {
+                "coin": coin,
+                "freeze": str(frozen),
+                "balance": str(balance),
+                "availableBalance": str(balance - frozen),
+            }
+        }
+
+    async def broadcast(self, packet: dict) -> None:
+        """推送给所有已订阅账户的客户端"""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        text: str = json.dumps(packet)
+        for ws in list(self.clients):
+            if not ws.closed:
+                await ws.send_str(text)
+
+    async def on_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        """Websocket连接"""
+        ws: web.WebSocketResponse = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.add(ws)
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+
+                if msg.data == "ping":
+                    await ws.send_str("pong")
+                    continue
+
+                packet: dict = json.loads(msg.data)
+                if packet.get("sub") == "subUser":
+                    if packet.get("token") in self.tokens:
+                        self.clients.add(ws)
+                        await ws.send_str("succeed")
+                    else:
+                        await ws.send_str("invalid_ws_token")
+        finally:
+            self.clients.discard(ws)
+            self.sockets.discard(ws)
+
+        return ws
+
+    async def _start(self) -> None:
+        """启动服务器"""
+        self.runner = web.AppRunner(self.create_app())
+        await self.runner.setup()
+        site: web.TCPSite = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+
+    def start(self) -> None:
+        """在后台线程中启动服务器"""
+        self.loop = asyncio.new_event_loop()
+        self.thread = Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+
+    def stop(self) -> None:
+        """停止服务器"""
+        if not self.loop:
+            return
+
+        # 先关闭全部连接，否则cleanup会等待行情连接超时
+        for ws in list(self.sockets):
+            asyncio.run_coroutine_threadsafe(ws.close(), self.loop).result()
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop = None
+
+
+def use_simulator(simulator: XEXSimulator) -> None:
+    """将网关的服务器地址指向模拟服务器"""
+    from . import xex_gateway
+
+    xex_gateway.BASE_URL = simulator.base_url
+    xex_gateway.WEBSOCKET_TRADE_HOST = simulator.websocket_host
+    xex_gateway.WEBSOCKET_DATA_HOST = simulator.websocket_host
+
+
+def main() -> None:
+    """命令行入口"""
+    parser: ArgumentParser = ArgumentParser(description="XEX交易所本地模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8069)
+    parser.add_argument("--latency", type=float, default=0, help="附加延时（秒）")
+    parser.add_argument("--fill", default=FILL_IMMEDIATE, choices=[FILL_NONE, FILL_IMMEDIATE, FILL_PARTIAL])
+    parser.add_argument("--error-rate", type=float, default=0, help="HTTP 500概率")
+    parser.add_argument("--reject-rate", type=float, default=0, help="批量委托拒单概率")
+    parser.add_argument("--item-reject-rate", type=float, default=0, help="单条委托拒单概率")
+    args = parser.parse_args()
+
+    simulator: XEXSimulator = XEXSimulator(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        fill_mode=args.fill,
+        error_rate=args.error_rate,
+        reject_rate=args.reject_rate,
+        item_reject_rate=args.item_reject_rate
+    )
+    web.run_app(simulator.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
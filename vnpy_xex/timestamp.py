@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, tzinfo
+from typing import List, Tuple
+
+import numpy as np
+import pytz
+
+CHINA_TZ = pytz.timezone("Asia/Shanghai")
+
+# 上海时区1991年以后没有夏令时，固定使用UTC+8的时区对象，与CHINA_TZ.localize的结果相同
+CHINA_TZINFO: tzinfo = CHINA_TZ.localize(datetime(2000, 1, 1)).tzinfo
+
+# 带时区的时间戳起点
+EPOCH: datetime = datetime(1970, 1, 1, 8, tzinfo=CHINA_TZINFO)
+
+# 秒内毫秒偏移
+MILLISECONDS: Tuple[timedelta, ...] = tuple(timedelta(milliseconds=i) for i in range(1000))
+
+
+class DatetimeConverter:
+    """
+    毫秒时间戳转换为带时区时间
+
+    同一秒内的推送很多，缓存最近一秒的整秒时间，命中时只需加上毫秒偏移。
+    缓存以元组整体替换，多线程调用时无需加锁。
+    """
+
+    def __init__(self) -> None:
+        """构造函数"""
+        self.cache: Tuple[int, datetime] = (None, None)
+
+    def convert(self, timestamp: float) -> datetime:
+        """转换毫秒时间戳"""
+        second, millisecond = divmod(timestamp, 1000)
+
+        cache: Tuple[int, datetime] = self.cache
+        if cache[0] != second:
+            cache = self.cache = (second, EPOCH + timedelta(seconds=int(second)))
+
+        if type(millisecond) is int:
+            return cache[1] + MILLISECONDS[millisecond]
+        return cache[1] + timedelta(milliseconds=float(millisecond))
+
+
+converter: DatetimeConverter = DatetimeConverter()
+
+generate_datetime = converter.convert
+
+
+def generate_datetimes(timestamps: np.ndarray) -> List[datetime]:
+    """批量转换毫秒时间戳数组，用于K线等整页数据"""
+    deltas: list = np.asarray(timestamps, dtype="int64").astype("timedelta64[ms]").tolist()
+    return [EPOCH + delta for delta in deltas]
+
+
+def to_datetime64(timestamps: np.ndarray) -> np.ndarray:
+    """毫秒时间戳数组转换为北京时间的datetime64[ms]数组（不带时区）"""
+    offset: int = int(EPOCH.utcoffset().total_seconds()) * 1000
+    return (np.asarray(timestamps, dtype="int64") + offset).astype("datetime64[ms]")
@@ -2,22 +2,30 @@ import asyncio
 import hashlib
 import hmac
 import json
+import os
+import sys
 import time
-from asyncio import run_coroutine_threadsafe
+from asyncio import AbstractEventLoop, new_event_loop, run_coroutine_threadsafe
+from collections import deque
 from copy import copy
 from datetime import datetime, timedelta
 from enum import Enum
+from pathlib import Path
 from threading import Lock
 from types import TracebackType
 
 import beeprint
+from aiohttp import ClientSession, WSMsgType
+import numpy as np
 from loguru import logger
 from vnpy_websocket import WebsocketClient
+from vnpy_websocket.websocket_client import start_event_loop
 import pytz
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 from requests.exceptions import SSLError
 from vnpy.trader.constant import (
     Direction,
+    Offset,
     Exchange,
     Product,
     Status,
@@ -33,21 +41,48 @@ from vnpy.trader.object import (
     OrderRequest,
     CancelRequest,
     HistoryRequest,
-    SubscribeRequest, TradeData
+    SubscribeRequest, TradeData,
+    TickData
 )
-from vnpy.event import EventEngine
-from vnpy_rest import RestClient, Request
-from vnpy.trader.utility import round_to
+from vnpy.event import Event, EventEngine
+from vnpy_rest import RestClient, Request, Response
+from vnpy.trader.utility import load_json, round_to, save_json
+
+from .account_conflator import AccountConflator
+from .async_rest import AsyncRestClient
+from .bootstrap import Bootstrap
+from .clock import ClockSync
+from .contract_table import load_contract_table
+from .bar_array import BarArray
+from .bar_cache import BAR_DTYPE, BarCache, merge_bars
+from .fills import FillIndex, calculate_fill_price, generate_tradeid
+from .journal import CHANNEL_MARKET_WS, CHANNEL_REST, CHANNEL_TRADE_WS, Journal, pack_response
+from .order_batcher import BatchItem, OrderBatcher
+from .metrics import LatencyMetrics, MetricsServer
+from .order_book import OrderBook
+from .order_conflator import OrderConflator
+from .order_id import OrderIdAllocator
+from .order_store import OrderChange, OrderRecord, OrderStore
+from .rate_limit import Priority, RequestScheduler
+from .reconnect import ReconnectSupervisor
+from .timestamp import generate_datetime
+
+# 优先使用更快的orjson解析推送数据
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 # 中国时区
 CHINA_TZ = pytz.timezone("Asia/Shanghai")
 
-# 实盘REST API地址
+# 实盘REST API地址，可通过环境变量指向模拟服务器
 # BASE_URL: str = "http://54.254.54.220:8069/"
-BASE_URL: str = "https://openapi.hipiex.net/spot/"
+BASE_URL: str = os.environ.get("XEX_BASE_URL", "https://openapi.hipiex.net/spot/")
 
-# 实盘Websocket API地址
-WEBSOCKET_TRADE_HOST: str = "wss://openapi.hipiex.net/websocket"
+# 实盘Websocket API地址，交易和行情分别通过环境变量指定，互不影响
+WEBSOCKET_TRADE_HOST: str = os.environ.get("XEX_WEBSOCKET_HOST", "wss://openapi.hipiex.net/websocket")
+WEBSOCKET_DATA_HOST: str = os.environ.get("XEX_DATA_WEBSOCKET_HOST", "wss://openapi.hipiex.net/websocket")
 # 委托状态映射
 STATUS_XEX2VT: Dict[str, Status] = {
     "NEW": Status.NOTTRADED,
@@ -93,6 +128,57 @@ TIMEDELTA_MAP: Dict[Interval, timedelta] = {
     Interval.DAILY: timedelta(days=1),
 }
 
+# Websocket纯文本控制帧
+WEBSOCKET_TEXT_FRAMES: frozenset = frozenset({"pong", "succeed", "invalid_ws_token"})
+
+# 历史K线单页数量
+HISTORY_PAGE_LIMIT: int = 1000
+
+# 历史K线并发请求数
+HISTORY_CONCURRENCY: int = 8
+
+# 单次批量委托请求的最大条目数
+BATCH_ORDER_LIMIT: int = 20
+
+# 接口请求权重，未列出的接口权重为1
+ENDPOINT_WEIGHTS: Dict[str, float] = {
+    "v1/exchangeInfo": 5,
+}
+
+# 交易类接口，其余接口按查询优先级调度
+BATCH_ORDER_PATH: str = "v1/trade/order/batchOrder"
+TRADE_PATHS: set = {BATCH_ORDER_PATH}
+
+# 合约信息本地缓存文件
+CONTRACT_CACHE_FILE: str = "xex_contract_cache.json"
+
+# 多进程模式下主进程共享的合约表文件，设置后不再单独查询合约信息
+CONTRACT_TABLE_FILE: str = ""
+
+# 委托对账并发请求数
+RECONCILE_CONCURRENCY: int = 4
+
+# 服务器时间同步：每轮采样次数和两轮之间的间隔（秒）
+CLOCK_SYNC_SAMPLES: int = 4
+CLOCK_SYNC_INTERVAL: float = 60
+
+# 关闭时等待REST事件循环停止的最长时间（秒）
+LOOP_STOP_TIMEOUT: float = 1
+
+# 网关就绪事件，数据为网关名称和各启动阶段耗时
+EVENT_XEX_READY: str = "eXexReady"
+
+# 合约停止交易事件，数据为网关名称、原合约数据和该合约的活动委托号
+EVENT_XEX_CONTRACT_REMOVED: str = "eXexContractRemoved"
+
+# 启动阶段
+PHASE_TIME: str = "time"
+PHASE_ACCOUNT: str = "account"
+PHASE_CONTRACT: str = "contract"
+PHASE_USER_STREAM: str = "user_stream"
+PHASE_ORDER: str = "order"
+BOOTSTRAP_PHASES: List[str] = [PHASE_TIME, PHASE_ACCOUNT, PHASE_CONTRACT, PHASE_USER_STREAM, PHASE_ORDER]
+
 # 合约数据全局缓存字典
 symbol_contract_map: Dict[str, ContractData] = {}
 
@@ -114,7 +200,16 @@ class XEXSpotGateway(BaseGateway):
         "key": "",
         "secret": "",
         "代理地址": "",
-        "代理端口": 0
+        "代理端口": 0,
+        "委托合并窗口(毫秒)": 0.0,
+        "REST模式": ["DEFAULT", "ASYNC"],
+        "请求限速(次/秒)": 0.0,
+        "资金推送间隔(毫秒)": 0.0,
+        "资金推送阈值(%)": 0.0,
+        "委托推送合并窗口(毫秒)": 0.0,
+        "对账报价币种冻结": ["否", "是"],
+        "录制文件": "",
+        "指标端口": 0
     }
 
     exchanges: Exchange = [Exchange.XEX]
@@ -124,11 +219,32 @@ class XEXSpotGateway(BaseGateway):
         super().__init__(event_engine, gateway_name)
 
         self.trade_ws_api: "XEXSpotTradeWebsocketApi" = XEXSpotTradeWebsocketApi(self)
+        self.market_ws_api: "XEXSpotDataWebsocketApi" = XEXSpotDataWebsocketApi(self)
         self.rest_api: "XEXSpotRestAPi" = XEXSpotRestAPi(self)
 
-        self.orders: Dict[str, OrderData] = {}
-        # 订单号(XEX的orderId)到vntrade OrderData的映射
-        self.order_id_map: Dict[str, OrderData] = {}
+        # 委托存储，包含活动委托索引和结束委托归档
+        self.order_store: OrderStore = OrderStore(gateway_name)
+        self.order_conflator: OrderConflator = None
+
+        # 收发数据录制
+        self.journal: Journal = None
+
+        # 服务器时钟偏差估计
+        self.clock: ClockSync = ClockSync()
+
+        # 延时统计和本地指标接口
+        self.metrics: LatencyMetrics = LatencyMetrics(self.clock)
+        self.metrics_server: MetricsServer = None
+
+        # 连接启动阶段管理
+        self.bootstrap: Bootstrap = Bootstrap(self.on_ready)
+
+        # 最新资金数据
+        self.accounts: Dict[str, AccountData] = {}
+        self.account_conflator: AccountConflator = None
+
+        # 成交去重索引
+        self.fill_index: FillIndex = FillIndex()
 
     def connect(self, setting: dict):
         """连接交易接口"""
@@ -136,8 +252,62 @@ class XEXSpotGateway(BaseGateway):
         secret: str = setting["secret"]
         proxy_host: str = setting["代理地址"]
         proxy_port: int = setting["代理端口"]
-
-        self.rest_api.connect(key, secret, proxy_host, proxy_port)
+        batch_window: float = setting.get("委托合并窗口(毫秒)", 0)
+        rest_mode: str = setting.get("REST模式", "DEFAULT")
+        rate_limit: float = setting.get("请求限速(次/秒)", 0)
+        account_interval: float = setting.get("资金推送间隔(毫秒)", 0)
+        account_threshold: float = setting.get("资金推送阈值(%)", 0)
+        order_window: float = setting.get("委托推送合并窗口(毫秒)", 0)
+        expand_quote: bool = setting.get("对账报价币种冻结", "否") == "是"
+        journal_path: str = setting.get("录制文件", "")
+        metrics_port: int = setting.get("指标端口", 0)
+
+        # 资金推送合并
+        if account_interval > 0:
+            self.account_conflator = AccountConflator(
+                self.trade_ws_api.get_loop(),
+                account_interval / 1000,
+                account_threshold / 100,
+                super().on_account
+            )
+        else:
+            self.account_conflator = None
+
+        # 委托推送合并
+        if order_window > 0:
+            self.order_conflator = OrderConflator(
+                self.trade_ws_api.get_loop(),
+                order_window / 1000,
+                super().on_order
+            )
+        else:
+            self.order_conflator = None
+
+        # 切换REST通道实现
+        rest_api_class: type = XEXSpotAsyncRestApi if rest_mode == "ASYNC" else XEXSpotRestAPi
+        if type(self.rest_api) is not rest_api_class:
+            self.rest_api.stop()
+            self.rest_api = rest_api_class(self)
+        self.rest_api.reconciler.expand_quote = expand_quote
+
+        # 收发数据录制
+        if self.journal:
+            self.journal.close()
+        self.journal = Journal(journal_path) if journal_path else None
+        for api in (self.rest_api, self.trade_ws_api, self.market_ws_api):
+            api.journal = self.journal
+
+        # 本地指标接口
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if metrics_port:
+            self.metrics_server = MetricsServer(metrics_port, self.get_metrics)
+            self.metrics_server.start()
+            self.write_log(f"指标接口启动成功，地址：http://127.0.0.1:{metrics_port}/metrics")
+
+        self.rest_api.connect(key, secret, proxy_host, proxy_port, batch_window, rate_limit)
+        self.market_ws_api.connect(proxy_host, proxy_port)
 
     def send_order(self, *reqs: OrderRequest) -> str:
         """委托下单 批量下单"""
@@ -147,13 +317,25 @@ class XEXSpotGateway(BaseGateway):
         """委托撤单"""
         self.rest_api.cancel_order(*reqs)
 
+    def cancel_all(self, symbol: str = None) -> List[str]:
+        """撤销全部活动委托，可以指定合约，返回撤单的委托号"""
+        return self.rest_api.cancel_by_predicate(None, symbol)
+
+    def cancel_by_predicate(self, predicate: Callable[[OrderRecord], bool], symbol: str = None) -> List[str]:
+        """撤销满足条件的活动委托，可以指定合约，返回撤单的委托号"""
+        return self.rest_api.cancel_by_predicate(predicate, symbol)
+
+    def get_cancel_failures(self) -> Dict[str, str]:
+        """查询撤单失败且仍为活动状态的委托，返回{委托号: 失败原因}"""
+        return self.rest_api.get_cancel_failures()
+
     def query_account(self) -> None:
         """查询资金"""
         pass
 
     def subscribe(self, req: SubscribeRequest) -> None:
         """订阅行情"""
-        pass
+        self.market_ws_api.subscribe(req)
 
     def query_position(self) -> None:
         """查询持仓"""
@@ -161,28 +343,136 @@ class XEXSpotGateway(BaseGateway):
 
     def query_history(self, req: HistoryRequest) -> List[BarData]:
         """查询历史数据"""
-        pass
+        return self.rest_api.query_history(req)
+
+    def query_history_array(self, req: HistoryRequest) -> BarArray:
+        """查询列式历史数据，遍历时才生成BarData"""
+        return self.rest_api.query_history_array(req)
 
     def close(self) -> None:
         """关闭连接"""
         self.rest_api.stop()
         self.trade_ws_api.stop()
+        self.market_ws_api.stop()
+
+        if self.journal:
+            self.journal.close()
 
-    def on_order(self, order: OrderData) -> None:
-        """推送委托数据"""
-        self.orders[order.orderid] = copy(order)
-        origin_orderId = getattr(order, "origin_orderId", None)
-        if origin_orderId is not None:
-            self.order_id_map[origin_orderId] = order
-        if origin_orderId in self.order_id_map.keys() and (
-                order.status == Status.ALLTRADED or order.status == Status.REJECTED or order.status == Status.CANCELLED):
-            self.order_id_map.pop(origin_orderId)
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
 
-        super().on_order(order)
+    def on_order(self, order: OrderData) -> Optional[OrderChange]:
+        """推送委托数据并返回提交的成交变化，过期推送直接丢弃并返回None"""
+        change: Optional[OrderChange] = self.order_store.update(order)
+        if not change:
+            return None
+
+        if self.order_conflator:
+            self.order_conflator.update(order)
+        else:
+            super().on_order(order)
+        return change
 
     def get_order(self, orderid: str) -> OrderData:
         """查询委托数据"""
-        return self.orders.get(orderid, None)
+        return self.order_store.get_order(orderid)
+
+    def on_trade(self, trade: TradeData) -> None:
+        """推送成交数据，已推送过的成交直接丢弃"""
+        if not self.fill_index.add(trade.tradeid):
+            return
+        super().on_trade(trade)
+
+    def process_fill(self, order: OrderData, change: OrderChange) -> None:
+        """根据委托存储提交前后累计成交量和成交均价的变化推送新增成交"""
+        if change.last_traded is None:
+            return
+
+        volume: float = change.traded - change.last_traded
+        contract: ContractData = symbol_contract_map.get(order.symbol, None)
+        if contract:
+            volume = round_to(volume, contract.min_volume)
+
+        if volume <= 0:
+            return
+
+        price: float = calculate_fill_price(change.last_traded, change.last_avg_price, change.traded, change.avg_price)
+        # 没有成交均价时使用委托价格
+        if not price:
+            price = order.price
+
+        trade: TradeData = TradeData(
+            symbol=order.symbol,
+            exchange=order.exchange,
+            orderid=order.orderid,
+            tradeid=generate_tradeid(getattr(order, "origin_orderId"), change.traded),
+            direction=order.direction,
+            offset=order.offset,
+            price=price,
+            volume=volume,
+            datetime=datetime.now(CHINA_TZ),
+            gateway_name=self.gateway_name
+        )
+        self.on_trade(trade)
+
+    def on_account(self, account: AccountData) -> None:
+        """推送资金数据"""
+        self.accounts[account.accountid] = account
+
+        if self.account_conflator:
+            self.account_conflator.update(account)
+        else:
+            super().on_account(account)
+
+    def get_account(self, accountid: str) -> AccountData:
+        """查询币种的最新资金数据"""
+        return self.accounts.get(accountid, None)
+
+    def get_all_accounts(self) -> Dict[str, AccountData]:
+        """查询全部币种的最新资金数据快照"""
+        return dict(self.accounts)
+
+    def get_metrics(self) -> dict:
+        """汇总延时、限速、重连和推送合并指标"""
+        metrics: dict = {
+            "latency": self.metrics.get_metrics(),
+            "clock": self.clock.get_metrics(),
+            "trade_ws": self.trade_ws_api.supervisor.get_metrics(),
+            "market_ws": self.market_ws_api.supervisor.get_metrics(),
+            "order_store": {
+                "active": len(self.order_store.active),
+                "archive": len(self.order_store.archive),
+            },
+        }
+
+        if self.rest_api.scheduler:
+            metrics["scheduler"] = self.rest_api.scheduler.get_metrics()
+        if self.account_conflator:
+            metrics["account_conflator"] = self.account_conflator.get_metrics()
+        if self.order_conflator:
+            metrics["order_conflator"] = self.order_conflator.get_metrics()
+        return metrics
+
+    def on_ready(self, timings: Dict[str, float]) -> None:
+        """网关启动完成"""
+        text: str = "，".join(f"{phase}:{cost * 1000:.0f}ms" for phase, cost in timings.items())
+        self.write_log(f"网关启动完成，{text}")
+
+        event: Event = Event(EVENT_XEX_READY, {"gateway_name": self.gateway_name, "timings": timings})
+        self.event_engine.put(event)
+
+    def on_contract_removed(self, contract: ContractData) -> None:
+        """合约已下架或暂停交易"""
+        orderids: List[str] = self.order_store.get_active_orderids(contract.symbol)
+        self.write_log(f"合约{contract.symbol}已停止交易，活动委托数量：{len(orderids)}")
+
+        data: dict = {
+            "gateway_name": self.gateway_name,
+            "contract": contract,
+            "active_orderids": orderids
+        }
+        self.event_engine.put(Event(EVENT_XEX_CONTRACT_REMOVED, data))
 
     @staticmethod
     def vn_symbol_to_exchange_symbol(vn_symbol: str):
@@ -205,6 +495,8 @@ class XEXSpotRestAPi(RestClient):
 
         self.key: str = ""
         self.secret: bytes = b""
+        self.hmac_state = hmac.new(self.secret, digestmod=hashlib.sha256)
+        self.signed_headers: Dict[str, str] = {}
         self.proxy_host = ""
         self.proxy_port = ""
 
@@ -212,29 +504,58 @@ class XEXSpotRestAPi(RestClient):
         self.keep_alive_count: int = 0
         self.recv_window: int = 5000
 
-        self.order_count: int = 1_000_000
-        self.order_count_lock: Lock = Lock()
-        self.connect_time: int = 0
+        self.order_id_allocator: OrderIdAllocator = None
+        self.journal: Journal = None
+
+        # 撤单失败的委托号和失败原因
+        self.cancel_failures: Dict[str, str] = {}
+
+        # 在限速队列中等待发送的下单：委托号到所在batchOrder条目列表
+        self.pending_creates: Dict[str, List[BatchItem]] = {}
+        # 已发出尚未返回的下单：委托号到等待下单返回后再发送的撤单
+        self.sent_creates: Dict[str, List[CancelRequest]] = {}
+        self.pending_lock: Lock = Lock()
+
+        # 服务器时间同步任务
+        self.clock_future: asyncio.Future = None
+
+        self.bar_cache: BarCache = BarCache()
+        self.order_batcher: OrderBatcher = None
+        self.scheduler: RequestScheduler = None
+
+        self.reconciler: XEXOrderReconciler = XEXOrderReconciler(self)
+
+    def init_signer(self, key: str, secret: str) -> None:
+        """初始化签名所需的密钥状态和固定请求头"""
+        self.key = key
+        self.secret = secret.encode()
+
+        # 预先完成HMAC密钥处理，签名时只需复制状态
+        self.hmac_state = hmac.new(self.secret, digestmod=hashlib.sha256)
+        self.signed_headers = {
+            "x_access_key": self.key,
+            'Content-Type': 'application/json',
+        }
 
     def sign(self, request: Request) -> Request:
         """生成XEX签名"""
-        security: Security = request.data["security"]
-        request.data.pop("security")
+        security: Security = request.data.pop("security")
         if security == Security.SIGNED:
-            if request.params is None: request.params = {}
-            query = ''
-            for key, value in sorted(request.params.items()):
-                query += f"{key}={value}&"
-            query = query[:-1]
-            signature = hmac.new(self.secret, query.encode(), hashlib.sha256).hexdigest()
+            params: dict = request.params
+            if params is None:
+                params = request.params = {}
+
+            query: str = "&".join([f"{key}={value}" for key, value in sorted(params.items())])
+            mac = self.hmac_state.copy()
+            mac.update(query.encode())
+
             # 添加请求头
-            headers = {
-                "x_access_key": self.key,
-                "x_signature": signature,
-                'Content-Type': 'application/json',
-            }
-            if request.headers is None: request.headers = {}
-            request.headers.update(headers)
+            headers: dict = request.headers
+            if headers is None:
+                headers = request.headers = dict(self.signed_headers)
+            else:
+                headers.update(self.signed_headers)
+            headers["x_signature"] = mac.hexdigest()
         return request
 
     def connect(
@@ -243,73 +564,221 @@ class XEXSpotRestAPi(RestClient):
             secret: str,
             proxy_host: str,
             proxy_port: int,
+            batch_window: float = 0,
+            rate_limit: float = 0
     ) -> None:
-        """连接REST服务器"""
-        self.key = key
-        self.secret = secret.encode()
+        """
+        连接REST服务器
+
+        batch_window为委托合并窗口（毫秒），rate_limit为每秒请求数上限，为0时不启用
+        """
+        self.init_signer(key, secret)
         self.proxy_host = proxy_host
         self.proxy_port = proxy_port
 
-        self.connect_time = (
-                int(datetime.now(CHINA_TZ).strftime("%y%m%d%H%M%S")) * self.order_count
-        )
+        # 同一账户共享委托号日志，重连、重启和多进程运行时委托号都不会重复
+        self.order_id_allocator = OrderIdAllocator(key, tz=CHINA_TZ)
+
+        # 独立阶段并发执行，依赖阶段在就绪后触发
+        bootstrap: Bootstrap = self.gateway.bootstrap
+        bootstrap.reset(BOOTSTRAP_PHASES)
+        bootstrap.when([PHASE_CONTRACT], self.trade_ws_api.process_pending_orders)
+        bootstrap.when([PHASE_CONTRACT, PHASE_ACCOUNT, PHASE_USER_STREAM], self.query_order)
+
+        # 存在合约缓存时无需等待交易所返回
+        cached: bool = self.load_contract_cache()
+        if cached:
+            bootstrap.mark(PHASE_CONTRACT)
 
         self.init(BASE_URL, proxy_host, proxy_port)
 
         self.start()
 
+        if batch_window > 0:
+            self.order_batcher = OrderBatcher(
+                self.loop,
+                batch_window / 1000,
+                BATCH_ORDER_LIMIT,
+                self.send_batch
+            )
+        else:
+            self.order_batcher = None
+
+        # 重新连接时事件循环仍在运行，旧调度器中排队的请求直接发出
+        if self.scheduler:
+            self.scheduler.stop()
+
+        if rate_limit > 0:
+            self.scheduler = RequestScheduler(rate_limit, rate_limit * 2)
+            self.scheduler.start()
+        else:
+            self.scheduler = None
+
         self.gateway.write_log("REST API启动成功")
 
         self.query_time()
         self.query_account()
-        self.query_contract()
+        if not (cached and CONTRACT_TABLE_FILE):
+            self.query_contract()
         self.start_user_stream()
 
-    def query_order(self) -> None:
-        """查询未成交委托"""
-        for symbol in symbol_contract_map.keys():
-            self.add_request(
-                method="GET",
-                path="v1/trade/order/listUnfinished",
-                params={"symbol": symbol, "direction": "BUY"},
-                callback=self.on_query_order,
-                data={"security": Security.SIGNED}
-            )
-            self.add_request(
-                method="GET",
-                path="v1/trade/order/listUnfinished",
-                params={"symbol": symbol, "direction": "SELL"},
-                callback=self.on_query_order,
-                data={"security": Security.SIGNED}
-            )
+    def start(self, session_number: int = 3) -> None:
+        """启动客户端，重新连接时复用已有的事件循环，避免会话和请求分属不同事件循环"""
+        if self.loop and not self.loop.is_closed():
+            start_event_loop(self.loop)
+            return
+        super().start(session_number)
 
-    def on_query_order(self, data: dict, request: Request) -> None:
-        """未成交委托查询回报"""
-        if data['code'] == 0:
-            for d in data['data']:
-                if d['orderType'] not in ORDERTYPE_XEX2VT.keys():
-                    continue
-                order: OrderData = OrderData(
-                    orderid=d['clientOrderId'],
-                    symbol=d['symbol'],
-                    exchange=Exchange.XEX,
-                    price=float(d["price"]),
-                    volume=float(d['origQty']),
-                    type=ORDERTYPE_XEX2VT[d['orderType']],
-                    direction=DIRECTION_XEX2VT[d['orderSide']],
-                    traded=float(d['executedQty']),
-                    status=STATUS_XEX2VT.get(d['state'], None),
-                    datetime=generate_datetime(d['createdTime']),
-                    gateway_name=self.gateway_name,
+    def stop(self) -> None:
+        """停止客户端，未发出的下单本地按拒单推送，无法发出的撤单记录为撤单失败"""
+        self.reject_deferred_cancels()
+
+        if self.scheduler:
+            self.reject_pending_creates()
+
+            dropped: Dict[Priority, int] = self.scheduler.stop(drain=False)
+            if dropped:
+                self.gateway.write_log(
+                    f"限速队列中的请求未发出：撤单{dropped.get(Priority.CANCEL, 0)}个，查询{dropped.get(Priority.QUERY, 0)}个"
                 )
-                setattr(order, "origin_orderId", d['orderId'])
-                self.gateway.on_order(order)
-            if data['data']:
-                self.gateway.write_log("委托信息查询成功")
+        if self.clock_future:
+            self.clock_future.cancel()
+            self.clock_future = None
+        super().stop()
+
+        # 已关闭的会话不能复用，重新连接时创建新会话
+        self.session = None
+        self.wait_loop_stopped()
+
+    def wait_loop_stopped(self) -> None:
+        """其他线程调用的loop.stop在事件循环被唤醒后才生效，等待其真正停止，重新连接时才能再次启动"""
+        loop: AbstractEventLoop = self.loop
+        if not loop or not loop.is_running():
+            return
+
+        loop.call_soon_threadsafe(lambda: None)
+
+        deadline: float = time.monotonic() + LOOP_STOP_TIMEOUT
+        while loop.is_running() and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def add_request(
+            self,
+            method: str,
+            path: str,
+            callback,
+            params: dict = None,
+            data: dict = None,
+            headers: dict = None,
+            on_failed=None,
+            on_error=None,
+            extra: Any = None,
+            priority: Priority = None
+    ) -> None:
+        """添加请求，启用限速时经过调度器按优先级发送"""
+        if not self.scheduler:
+            self.send_request(method, path, callback, params, data, headers, on_failed, on_error, extra)
+            return
+
+        if priority is None:
+            priority = Priority.ORDER if path in TRADE_PATHS else Priority.QUERY
+
+        self.scheduler.submit(
+            priority,
+            ENDPOINT_WEIGHTS.get(path, 1),
+            lambda: self.send_request(method, path, callback, params, data, headers, on_failed, on_error, extra)
+        )
+
+    def send_request(
+            self,
+            method: str,
+            path: str,
+            callback,
+            params: dict = None,
+            data: dict = None,
+            headers: dict = None,
+            on_failed=None,
+            on_error=None,
+            extra: Any = None
+    ) -> None:
+        """不经过限速调度直接发送请求，所有REST请求最终都经过这里，子类可以覆盖以替换传输"""
+        super().add_request(method, path, callback, params, data, headers, on_failed, on_error, extra)
+
+    async def _get_response(self, request: Request) -> Response:
+        """发送请求并返回结果，统计请求耗时，启用录制时记录原始返回"""
+        start: int = time.monotonic_ns()
+        response: Response = await super()._get_response(request)
+        self.gateway.metrics.on_response(request.path, start)
+
+        if self.journal:
+            self.journal.append(CHANNEL_REST, pack_response(request, response))
+        return response
+
+    async def wait_scheduler(self, priority: Priority, path: str) -> None:
+        """启用限速时等待调度器放行，用于在事件循环中直接发送的请求"""
+        scheduler: RequestScheduler = self.scheduler
+        if not scheduler:
+            return
+
+        loop: AbstractEventLoop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+
+        def release() -> None:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        scheduler.submit(priority, ENDPOINT_WEIGHTS.get(path, 1), release)
+        await future
+
+    def query_order(self) -> None:
+        """查询未成交委托，对账完成后标记委托阶段就绪"""
+        self.reconciler.start(lambda: self.gateway.bootstrap.mark(PHASE_ORDER))
 
     def query_time(self) -> None:
-        """查询时间"""
-        ...
+        """启动服务器时间同步"""
+        if self.clock_future:
+            self.clock_future.cancel()
+        self.clock_future = run_coroutine_threadsafe(self._sync_clock(), self.loop)
+
+    async def _sync_clock(self) -> None:
+        """定时采样服务器时间，首轮采样结束后标记时间阶段就绪"""
+        while True:
+            succeeded: int = 0
+            for _ in range(CLOCK_SYNC_SAMPLES):
+                succeeded += await self._sample_clock()
+
+            if not succeeded:
+                self.gateway.write_log("服务器时间查询失败，使用本地时间")
+            self.gateway.bootstrap.mark(PHASE_TIME)
+
+            await asyncio.sleep(CLOCK_SYNC_INTERVAL)
+
+    async def _sample_clock(self) -> bool:
+        """采样一次服务器时间，先等待限速放行再开始计时，避免排队时间计入往返时延"""
+        request: Request = Request(
+            method="GET",
+            path="v1/public/time",
+            params=None,
+            data={"security": Security.NONE},
+            headers=None
+        )
+        await self.wait_scheduler(Priority.QUERY, request.path)
+
+        send_time: float = time.time() * 1000
+        try:
+            response: Response = await self._get_response(request)
+        except Exception:
+            return False
+        receive_time: float = time.time() * 1000
+
+        if response.status_code // 100 != 2:
+            return False
+
+        data: dict = response.json()
+        if data.get("code") != 0:
+            return False
+
+        self.gateway.clock.add_sample(send_time, float(data["data"]), receive_time)
+        return True
 
     def query_account(self) -> None:
         """查询资金"""
@@ -334,21 +803,137 @@ class XEXSpotRestAPi(RestClient):
             data=data
         )
 
+    def query_history(self, req: HistoryRequest) -> List[BarData]:
+        """查询历史数据"""
+        return self.query_history_array(req).to_list()
+
+    def query_history_array(self, req: HistoryRequest) -> BarArray:
+        """查询列式历史数据，只下载本地缓存中缺失的部分"""
+        interval_ms: int = int(TIMEDELTA_MAP[req.interval].total_seconds()) * 1000
+        now: int = self.gateway.clock.now()
+        start: int = int(req.start.timestamp() * 1000)
+        end: int = int(req.end.timestamp() * 1000) if req.end else now
+
+        cached: np.ndarray = self.bar_cache.load(req.symbol, req.interval)
+
+        # 计算缓存缺失的时间段，缓存最早K线之前已确认没有数据的部分（如上市前）不再下载
+        ranges: List[Tuple[int, int]] = []
+        if not len(cached):
+            ranges.append((start, end))
+        else:
+            first: int = int(cached["datetime"][0])
+            last: int = int(cached["datetime"][-1])
+
+            covered: int = self.bar_cache.load_start(req.symbol, req.interval)
+            if covered and covered < first:
+                first = covered
+
+            if start < first:
+                ranges.append((start, first - interval_ms))
+            if end > last:
+                ranges.append((last + interval_ms, end))
+
+        # 按单页数量拆分请求
+        page_span: int = interval_ms * HISTORY_PAGE_LIMIT
+        pages: List[Tuple[int, int]] = []
+        for range_start, range_end in ranges:
+            page_start: int = range_start
+            while page_start <= range_end:
+                page_end: int = min(page_start + page_span - interval_ms, range_end)
+                pages.append((page_start, page_end))
+                page_start = page_end + interval_ms
+
+        bars: np.ndarray = cached
+        if pages:
+            coro = self._query_history_pages(req, pages)
+            downloaded, complete = run_coroutine_threadsafe(coro, self.loop).result()
+
+            # 所有分页都成功时才写入缓存，且只缓存已经完结的K线
+            if complete:
+                finished: np.ndarray = downloaded[downloaded["datetime"] + interval_ms <= now]
+                cached = self.bar_cache.save(req.symbol, req.interval, finished)
+
+                # start到缓存最早K线之间的时间段已全部下载且没有数据，记录后不再重复下载
+                if len(cached) and start < int(cached["datetime"][0]):
+                    self.bar_cache.save_start(req.symbol, req.interval, start)
+            bars = merge_bars(cached, downloaded)
+
+        bars = bars[(bars["datetime"] >= start) & (bars["datetime"] <= end)]
+        history: BarArray = BarArray(req.symbol, req.exchange, req.interval, self.gateway_name, bars)
+
+        if len(history):
+            first: datetime = generate_datetime(int(history.timestamps[0]))
+            last: datetime = generate_datetime(int(history.timestamps[-1]))
+            msg: str = f"获取历史数据成功，{req.symbol} - {req.interval.value}，{first} - {last}"
+            self.gateway.write_log(msg)
+
+        return history
+
+    async def _query_history_pages(
+            self,
+            req: HistoryRequest,
+            pages: List[Tuple[int, int]]
+    ) -> Tuple[np.ndarray, bool]:
+        """并发下载历史数据分页，返回合并去重后的数据以及是否全部下载成功"""
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(HISTORY_CONCURRENCY)
+
+        async def query_page(page_start: int, page_end: int) -> np.ndarray:
+            async with semaphore:
+                request: Request = Request(
+                    method="GET",
+                    path="v1/public/kline",
+                    params={
+                        "symbol": req.symbol,
+                        "interval": INTERVAL_VT2XEX[req.interval],
+                        "startTime": page_start,
+                        "endTime": page_end,
+                        "limit": HISTORY_PAGE_LIMIT
+                    },
+                    data={"security": Security.NONE},
+                    headers=None
+                )
+                await self.wait_scheduler(Priority.QUERY, request.path)
+
+                try:
+                    response = await self._get_response(request)
+                except Exception as e:
+                    self.gateway.write_log(f"获取历史数据异常，{req.symbol}：{e!r}")
+                    return None
+
+                if response.status_code // 100 != 2:
+                    msg: str = f"获取历史数据失败，状态码：{response.status_code}，信息：{response.text}"
+                    self.gateway.write_log(msg)
+                    return None
+
+                data: dict = response.json()
+                if data.get("code") != 0:
+                    self.gateway.write_log(f"获取历史数据失败，信息：{data}")
+                    return None
+
+                return parse_kline_rows(data["data"])
+
+        results: list = await asyncio.gather(*[query_page(*page) for page in pages])
+        arrays: List[np.ndarray] = [r for r in results if r is not None]
+        return merge_bars(*arrays), len(arrays) == len(results)
+
     def _new_order_id(self) -> int:
         """生成本地委托号"""
-        with self.order_count_lock:
-            self.order_count += 1
-            return self.order_count
+        return self.order_id_allocator.new_id()
 
     def send_order(self, *reqs: OrderRequest) -> str:
         """委托下单 批量下单"""
         vt_orderids = []  # 单号
-        order_params = []  # 下单参数
+        items: List[BatchItem] = []  # 下单参数和委托
         for req in reqs:
-            req.price = round_to(req.price, symbol_contract_map[req.symbol].pricetick)
-            req.volume = round_to(req.volume, symbol_contract_map[req.symbol].min_volume)
+            contract: ContractData = symbol_contract_map.get(req.symbol, None)
+            if not contract:
+                self.gateway.write_log(f"委托失败，找不到该合约代码{req.symbol}")
+                continue
+
+            req.price = round_to(req.price, contract.pricetick)
+            req.volume = round_to(req.volume, contract.min_volume)
             # 生成本地委托号
-            orderid: str = str(self.connect_time + self._new_order_id())
+            orderid: str = str(self._new_order_id())
 
             # 推送提交中事件
             order: OrderData = req.create_order_data(
@@ -357,61 +942,227 @@ class XEXSpotRestAPi(RestClient):
             )
             order.datetime = datetime.now(CHINA_TZ)
             self.gateway.on_order(order)
-            order_params.append({"isCreate": True,
-                                 "symbol": req.symbol,
-                                 "price": req.price,
-                                 "totalAmount": req.volume,
-                                 "tradeType": ORDERTYPE_VT2XEX[req.type],
-                                 "direction": DIRECTION_VT2XEX[req.direction],
-                                 "clientOrderId": orderid})
+            self.gateway.metrics.on_send(orderid, req.symbol)
+            items.append(({"isCreate": True,
+                           "symbol": req.symbol,
+                           "price": req.price,
+                           "totalAmount": req.volume,
+                           "tradeType": ORDERTYPE_VT2XEX[req.type],
+                           "direction": DIRECTION_VT2XEX[req.direction],
+                           "clientOrderId": orderid}, order))
             vt_orderids.append(order.vt_orderid)
-        # 批量下单请求
-        data: dict = {
-            "security": Security.SIGNED
-        }
-        params: dict = {"list": json.dumps(order_params)}
 
-        self.add_request(
-            method="POST",
-            path="v1/trade/order/batchOrder",
-            callback=self.on_send_order,
-            params=params,
-            data=data,
-            on_error=self.on_send_order_error,
-            on_failed=self.on_send_order_failed
-        )
+        if items:
+            self.submit_batch(items)
 
         # 生成委托请求
-        if len(vt_orderids) == 1:
+        if not vt_orderids:
+            return ""
+        elif len(vt_orderids) == 1:
             return vt_orderids[0]
         else:
             return vt_orderids
 
     def cancel_order(self, *reqs: CancelRequest) -> None:
         """委托撤单"""
-        data: dict = {
-            "security": Security.SIGNED
-        }
+        reqs = self.withdraw_creates(reqs)
+        if reqs:
+            self.submit_batch(self.create_cancel_items(reqs))
+
+    def cancel_by_predicate(self, predicate: Callable[[OrderRecord], bool] = None, symbol: str = None) -> List[str]:
+        """
+        按条件批量撤单
+
+        从委托存储中选出活动委托，跳过合并窗口直接拆分为并发的batchOrder请求。
+        predicate为None时撤销全部活动委托。
+        """
+        reqs: List[CancelRequest] = [
+            CancelRequest(orderid=record.orderid, symbol=record.symbol, exchange=record.exchange)
+            for record in self.gateway.order_store.get_active_records(symbol)
+            if predicate is None or predicate(record)
+        ]
+        orderids: List[str] = [req.orderid for req in reqs]
+
+        reqs = self.withdraw_creates(reqs)
+        if reqs:
+            self.send_batch(self.create_cancel_items(reqs))
+        return orderids
+
+    def withdraw_creates(self, reqs: List[CancelRequest]) -> List[CancelRequest]:
+        """
+        撤回尚未发出的下单，返回现在就需要发送给交易所的撤单请求
+
+        撤单优先级高于下单，且撤全部时跳过合并窗口，若下单仍在合并窗口或限速队列中，
+        撤单会先于下单到达交易所而失败。此类下单直接撤回，本地按拒单推送。
+        下单已发出但尚未返回时，撤单等到下单返回后再发送。
+        """
+        orderids: Set[str] = {req.orderid for req in reqs}
 
-        cancel_params = []  # 撤单参数
-        params: dict = {"list": ""}
+        withdrawn: List[BatchItem] = []
+        if self.order_batcher:
+            withdrawn.extend(self.order_batcher.withdraw(orderids))
+
+        deferred: Set[str] = set()
+        with self.pending_lock:
+            for req in reqs:
+                orderid: str = req.orderid
+
+                cancels: List[CancelRequest] = self.sent_creates.get(orderid, None)
+                if cancels is not None:
+                    cancels.append(req)
+                    deferred.add(orderid)
+                    continue
+
+                chunk: List[BatchItem] = self.pending_creates.pop(orderid, None)
+                if chunk is None:
+                    continue
+
+                for item in chunk:
+                    if item[0]["isCreate"] and item[0]["clientOrderId"] == orderid:
+                        chunk.remove(item)
+                        withdrawn.append(item)
+                        break
+
+        if not withdrawn:
+            return [req for req in reqs if req.orderid not in deferred]
+
+        self.reject_withdrawn(withdrawn)
+
+        withdrawn_ids: Set[str] = {param["clientOrderId"] for param, _ in withdrawn}
+        return [req for req in reqs if req.orderid not in withdrawn_ids and req.orderid not in deferred]
+
+    def reject_pending_creates(self) -> None:
+        """撤回限速队列中尚未发出的全部下单"""
+        withdrawn: List[BatchItem] = []
+        with self.pending_lock:
+            chunks: Dict[int, List[BatchItem]] = {id(chunk): chunk for chunk in self.pending_creates.values()}
+            for chunk in chunks.values():
+                creates: List[BatchItem] = [item for item in chunk if item[0]["isCreate"]]
+                for item in creates:
+                    chunk.remove(item)
+                withdrawn.extend(creates)
+            self.pending_creates.clear()
+
+        if withdrawn:
+            self.reject_withdrawn(withdrawn)
+
+    def reject_withdrawn(self, withdrawn: List[BatchItem]) -> None:
+        """撤回的下单本地按拒单推送"""
+        for _, target in withdrawn:
+            order: OrderData = copy(target)
+            order.status = Status.REJECTED
+            self.gateway.on_order(order)
+        self.gateway.write_log(f"撤回尚未发出的委托{len(withdrawn)}笔")
+
+    def reject_deferred_cancels(self) -> None:
+        """停止时下单仍未返回，等待中的撤单已无法发出，逐个记录撤单失败"""
+        with self.pending_lock:
+            cancels: List[CancelRequest] = [req for reqs in self.sent_creates.values() for req in reqs]
+            self.sent_creates.clear()
+
+        for req in cancels:
+            reason: str = "连接已关闭，撤单未发出"
+            self.cancel_failures[req.orderid] = reason
+            self.gateway.write_log(f"撤单失败，委托号：{req.orderid}，{reason}")
+
+    def release_creates(self, request: Request) -> None:
+        """下单请求返回，发送等待中的撤单"""
+        cancels: List[CancelRequest] = []
+        with self.pending_lock:
+            for target in request.extra or ():
+                if isinstance(target, OrderData):
+                    cancels.extend(self.sent_creates.pop(target.orderid, ()))
+
+        # 下单失败时委托可能仍已到达交易所，撤单照常发送
+        if cancels:
+            self.cancel_order(*cancels)
+
+    def create_cancel_items(self, reqs: List[CancelRequest]) -> List[BatchItem]:
+        """生成撤单条目"""
+        items: List[BatchItem] = []  # 撤单参数和撤单请求
         for req in reqs:
-            order: OrderData = self.gateway.get_order(req.orderid)
-            cancel_params.append(
+            # 重新撤单时清除之前的失败记录
+            self.cancel_failures.pop(req.orderid, None)
+            self.gateway.metrics.on_cancel(req.orderid)
+
+            items.append((
                 {"isCreate": False,
                  "symbol": self.gateway.vn_symbol_to_exchange_symbol(req.symbol),
-                 'clientOrderId': req.orderid}
+                 'clientOrderId': req.orderid},
+                req
+            ))
+        return items
+
+    def get_cancel_failures(self) -> Dict[str, str]:
+        """查询撤单失败且仍为活动状态的委托"""
+        order_store: OrderStore = self.gateway.order_store
+
+        failures: Dict[str, str] = {}
+        for orderid, reason in list(self.cancel_failures.items()):
+            record: OrderRecord = order_store.get(orderid)
+            if record and record.is_active():
+                failures[orderid] = reason
+            else:
+                self.cancel_failures.pop(orderid, None)
+        return failures
+
+    def submit_batch(self, items: List[BatchItem]) -> None:
+        """提交批量委托条目，开启合并时先进入合并窗口"""
+        if self.order_batcher:
+            self.order_batcher.add(items)
+        else:
+            self.send_batch(items)
+
+    def send_batch(self, items: List[BatchItem]) -> None:
+        """按交易所批量上限拆分发送batchOrder请求"""
+        data: dict = {
+            "security": Security.SIGNED
+        }
+
+        # 撤单排在前面，优先占用批量请求
+        items = sorted(items, key=lambda item: item[0]["isCreate"])
+
+        for i in range(0, len(items), BATCH_ORDER_LIMIT):
+            chunk: List[BatchItem] = items[i:i + BATCH_ORDER_LIMIT]
+            has_cancel: bool = not chunk[0][0]["isCreate"]
+
+            if not self.scheduler:
+                self.send_chunk(chunk, data)
+                continue
+
+            # 排队期间下单可能被撤回，发送时才生成请求参数
+            with self.pending_lock:
+                for param, _ in chunk:
+                    if param["isCreate"]:
+                        self.pending_creates[param["clientOrderId"]] = chunk
+
+            self.scheduler.submit(
+                Priority.CANCEL if has_cancel else Priority.ORDER,
+                ENDPOINT_WEIGHTS.get(BATCH_ORDER_PATH, 1),
+                lambda chunk=chunk: self.send_chunk(chunk, data)
             )
-        params["list"] = json.dumps(cancel_params)
-        self.add_request(
+
+    def send_chunk(self, chunk: List[BatchItem], data: dict) -> None:
+        """发送一个batchOrder请求，已撤回的下单不再发送"""
+        with self.pending_lock:
+            for param, _ in chunk:
+                if param["isCreate"]:
+                    self.pending_creates.pop(param["clientOrderId"], None)
+                    self.sent_creates[param["clientOrderId"]] = []
+            chunk = list(chunk)
+
+        if not chunk:
+            return
+
+        self.send_request(
             method="POST",
-            path="v1/trade/order/batchOrder",
-            callback=self.on_cancel_order,
-            params=params,
-            data=data,
-            on_failed=self.on_cancel_failed,
-            on_error=self.on_cancel_error,
-            extra=order
+            path=BATCH_ORDER_PATH,
+            callback=self.on_batch_order,
+            params={"list": json.dumps([param for param, _ in chunk])},
+            data=dict(data),
+            on_error=self.on_batch_order_error,
+            on_failed=self.on_batch_order_failed,
+            extra=[target for _, target in chunk]
         )
 
     def start_user_stream(self):
@@ -427,7 +1178,7 @@ class XEXSpotRestAPi(RestClient):
         self.add_request(
             method="GET",
             path="v1/u/ws/token",
-            params={"time": int(time.time() * 1000)},
+            params={"time": self.gateway.clock.now()},
             callback=callback,
             data=data
         )
@@ -447,10 +1198,14 @@ class XEXSpotRestAPi(RestClient):
                     self.gateway.on_account(account)
 
             self.gateway.write_log("账户资金查询成功")
+            self.gateway.bootstrap.mark(PHASE_ACCOUNT)
 
     def on_query_contract(self, data: dict, request: Request) -> None:
-        """合约信息查询回报"""
+        """合约信息查询回报，只推送与本地缓存相比发生变化的合约"""
         if data.get('code') == 0:
+            changed: int = 0
+            listed: set = set()
+
             for symbol in data['data']['pairs']:
                 if symbol['state'] == 1:
                     base_currency: str = symbol['sellCoin']
@@ -459,78 +1214,151 @@ class XEXSpotRestAPi(RestClient):
 
                     pricetick = symbol['minStepPrice']
                     min_volume = symbol['minQty']
+                    listed.add(symbol["symbol"])
 
-                    contract: ContractData = ContractData(
-                        symbol=symbol["symbol"],
-                        exchange=Exchange.XEX,
-                        name=name,
-                        pricetick=pricetick,
-                        size=1,
-                        min_volume=min_volume,
-                        product=Product.SPOT,
-                        history_data=True,
-                        gateway_name=self.gateway_name,
-                        stop_supported=True
-                    )
+                    old_contract: ContractData = symbol_contract_map.get(symbol["symbol"], None)
+                    if (
+                        old_contract
+                        and old_contract.pricetick == pricetick
+                        and old_contract.min_volume == min_volume
+                    ):
+                        continue
+
+                    contract: ContractData = self.create_contract(symbol["symbol"], name, pricetick, min_volume)
                     self.gateway.on_contract(contract)
 
                     symbol_contract_map[contract.symbol] = contract
+                    changed += 1
 
-            self.gateway.write_log("合约信息查询成功")
-            # self.query_order()
+            # 移除已下架或暂停交易的合约
+            for symbol in list(symbol_contract_map):
+                if symbol not in listed:
+                    self.gateway.on_contract_removed(symbol_contract_map.pop(symbol))
+                    changed += 1
 
-    def on_send_order(self, data: dict, request: Request) -> None:
-        """委托下单回报"""
-        pass
-
-    def on_send_order_failed(self, status_code: str, request: Request) -> None:
-        """委托下单失败服务器报错回报"""
-        logger.debug(
-            f"on_send_order_failed {status_code=} {request.path=} request.params={beeprint.pp(request.params, output=False, sort_keys=False)}")
+            if changed:
+                self.save_contract_cache()
 
-        order: OrderData = request.extra
-        order.status = Status.REJECTED
-        self.gateway.on_order(order)
+            self.gateway.write_log(f"合约信息查询成功，变化合约数量：{changed}")
+            self.gateway.bootstrap.mark(PHASE_CONTRACT)
 
-        msg: str = f"委托失败，状态码：{status_code}，信息：{request.response.text}"
-        self.gateway.write_log(msg)
+    def create_contract(self, symbol: str, name: str, pricetick: float, min_volume: float) -> ContractData:
+        """创建合约数据"""
+        return ContractData(
+            symbol=symbol,
+            exchange=Exchange.XEX,
+            name=name,
+            pricetick=pricetick,
+            size=1,
+            min_volume=min_volume,
+            product=Product.SPOT,
+            history_data=True,
+            gateway_name=self.gateway_name,
+            stop_supported=True
+        )
 
-    def on_send_order_error(
-            self, exception_type: type, exception_value: Exception, tb, request: Request
-    ) -> None:
-        """委托下单回报函数报错回报"""
-        logger.debug(
-            f"on_send_order_error {exception_type=} {exception_value=} {tb=} {request.path=} request.params={beeprint.pp(request.params, output=False, sort_keys=False)}")
+    def load_contract_cache(self) -> bool:
+        """加载本地缓存的合约信息，使网关无需等待交易所返回即可下单"""
+        if CONTRACT_TABLE_FILE:
+            cache: dict = load_contract_table(Path(CONTRACT_TABLE_FILE))
+        else:
+            cache = load_json(CONTRACT_CACHE_FILE)
+
+        for symbol, d in cache.items():
+            contract: ContractData = self.create_contract(symbol, d["name"], d["pricetick"], d["min_volume"])
+            symbol_contract_map[symbol] = contract
+            self.gateway.on_contract(contract)
+
+        if cache:
+            self.gateway.write_log(f"合约信息缓存加载成功，合约数量：{len(cache)}")
+        return bool(cache)
+
+    def save_contract_cache(self) -> None:
+        """保存合约信息到本地缓存"""
+        cache: dict = {
+            symbol: {
+                "name": contract.name,
+                "pricetick": contract.pricetick,
+                "min_volume": contract.min_volume
+            }
+            for symbol, contract in list(symbol_contract_map.items())
+        }
+        save_json(CONTRACT_CACHE_FILE, cache)
 
-        order: OrderData = request.extra
-        order.status = Status.REJECTED
-        self.gateway.on_order(order)
+    def on_batch_order(self, data: dict, request: Request) -> None:
+        """批量委托回报，整体成功时逐条检查结果"""
+        self.release_creates(request)
 
-        if not issubclass(exception_type, (ConnectionError, SSLError)):
-            self.on_error(exception_type, exception_value, tb, request)
+        if data.get("code") == 0:
+            self.reject_items(data.get("data"), request)
+            return
 
-    def on_cancel_order(self, data: dict, request: Request) -> None:
-        """委托撤单回报"""
         logger.debug(
-            f"on_cancel_order data={beeprint.pp(data, output=False, sort_keys=False)} {request.path=} request.params={beeprint.pp(request.params, output=False, sort_keys=False)}")
+            f"on_batch_order data={beeprint.pp(data, output=False, sort_keys=False)} {request.path=} request.params={beeprint.pp(request.params, output=False, sort_keys=False)}")
 
-    def on_cancel_failed(self, status_code: str, request: Request) -> None:
-        """撤单回报函数报错回报"""
+        self.reject_batch(request, f"信息：{data}")
+        self.gateway.write_log(f"批量委托失败，信息：{data}")
+
+    def on_batch_order_failed(self, status_code: str, request: Request) -> None:
+        """批量委托失败服务器报错回报"""
         logger.debug(
-            f"on_cancel_failed {status_code=} {request.path=} request.params={beeprint.pp(request.params, output=False, sort_keys=False)}")
+            f"on_batch_order_failed {status_code=} {request.path=} request.params={beeprint.pp(request.params, output=False, sort_keys=False)}")
+
+        self.reject_batch(request, f"状态码：{status_code}")
+        self.release_creates(request)
 
-        msg = f"撤单失败，状态码：{status_code}，信息：{request.response.text}"
+        msg: str = f"批量委托失败，状态码：{status_code}，信息：{request.response.text}"
         self.gateway.write_log(msg)
 
-    def on_cancel_error(
+    def on_batch_order_error(
             self, exception_type: type, exception_value: Exception, tb: TracebackType, request: Request
-    ):
+    ) -> None:
+        """批量委托回报函数报错回报"""
         logger.debug(
-            f"on_cancel_error {exception_type=} {exception_value=} {tb.tb_next=} {request.path=} request.params={beeprint.pp(request.params, output=False, sort_keys=False)}")
+            f"on_batch_order_error {exception_type=} {exception_value=} {tb=} {request.path=} request.params={beeprint.pp(request.params, output=False, sort_keys=False)}")
+
+        self.reject_batch(request, f"异常：{exception_value!r}")
+        self.release_creates(request)
 
         if not issubclass(exception_type, (ConnectionError, SSLError)):
             self.on_error(exception_type, exception_value, tb, request)
 
+    def reject_batch(self, request: Request, reason: str) -> None:
+        """批量委托失败时，拒单其中的下单委托，并逐个记录撤单失败"""
+        # 回放录制数据时没有委托对象
+        for target in request.extra or ():
+            self.reject_target(target, reason)
+
+    def reject_items(self, results: List[dict], request: Request) -> None:
+        """批量委托整体成功时，按clientOrderId拒单返回错误码的下单，并记录失败的撤单"""
+        if not isinstance(results, list):
+            return
+
+        failed: Dict[str, str] = {}
+        for item in results:
+            if isinstance(item, dict) and item.get("code", 0) != 0 and "clientOrderId" in item:
+                failed[item["clientOrderId"]] = f"信息：{item}"
+
+        if not failed:
+            return
+
+        for target in request.extra or ():
+            reason: str = failed.get(target.orderid, None)
+            if reason:
+                self.reject_target(target, reason)
+
+        self.gateway.write_log(f"批量委托部分失败，失败数量：{len(failed)}")
+
+    def reject_target(self, target: Union[OrderData, CancelRequest], reason: str) -> None:
+        """拒单下单委托，或记录撤单失败"""
+        if isinstance(target, OrderData):
+            order: OrderData = copy(target)
+            order.status = Status.REJECTED
+            self.gateway.on_order(order)
+        else:
+            self.cancel_failures[target.orderid] = reason
+            self.gateway.write_log(f"撤单失败，委托号：{target.orderid}，{reason}")
+
     def on_keep_user_stream(self, data: dict, request: Request) -> None:
         """延长listenKey有效期回报"""
         pass
@@ -544,36 +1372,411 @@ class XEXSpotRestAPi(RestClient):
             self.on_error(exception_type, exception_value, tb, request)
 
 
+class XEXSpotAsyncRestApi(XEXSpotRestAPi, AsyncRestClient):
+    """运行在交易Websocket事件循环上的XEX现货REST API"""
+
+    def start(self, session_number: int = 3) -> None:
+        """启动客户端，共享交易Websocket的事件循环"""
+        self.loop = self.trade_ws_api.get_loop()
+        super().start(session_number)
+
+    def wait_loop_stopped(self) -> None:
+        """事件循环由交易Websocket负责停止，无需等待"""
+        pass
+
+
+class XEXOrderReconciler:
+    """
+    未成交委托对账
+
+    只查询有活动委托或冻结资产的合约，每个合约一次listUnfinished请求，并限制并发数量。
+    查询结果与本地委托存储比较，只推送发生变化的委托，
+    本地仍为活动状态但交易所不再返回的委托逐个查询最终状态并补齐成交，查询失败时保持不变。
+    """
+
+    def __init__(self, rest_api: XEXSpotRestAPi) -> None:
+        """构造函数"""
+        self.rest_api: XEXSpotRestAPi = rest_api
+        self.gateway: XEXSpotGateway = rest_api.gateway
+        self.gateway_name: str = rest_api.gateway_name
+
+        self.lock: Lock = Lock()
+        self.active: bool = False
+        self.pending: deque = deque()
+        self.inflight: int = 0
+        self.succeeded: List[str] = []
+        self.reported: set = set()
+        self.start_time: datetime = None
+        self.callbacks: List[Callable[[], None]] = []
+        self.detail_pending: int = 0
+        self.symbol_count: int = 0
+
+        # 报价币种有冻结时是否对账该币种的全部合约，一笔USDT买单就会展开所有USDT合约，默认关闭
+        self.expand_quote: bool = False
+
+    def get_symbols(self) -> List[str]:
+        """
+        需要对账的合约：有本地活动委托或基础币种有冻结（可能有卖单）的合约
+
+        启用expand_quote时，报价币种有冻结（可能有买单）的合约也加入对账，
+        用于本地没有委托记录的买单，例如进程重启后。
+        """
+        symbols: set = set(self.gateway.order_store.get_active_symbols())
+
+        frozen_coins: set = {account.accountid for account in self.gateway.accounts.values() if account.frozen}
+        if frozen_coins:
+            for symbol in list(symbol_contract_map):
+                base, _, quote = symbol.partition("_")
+                if base in frozen_coins or (self.expand_quote and quote in frozen_coins):
+                    symbols.add(symbol)
+
+        return [symbol for symbol in symbols if symbol in symbol_contract_map]
+
+    def start(self, callback: Callable[[], None] = None, symbols: List[str] = None) -> None:
+        """开始对账，symbols为空时按get_symbols选择合约，已在对账中时只登记完成回调"""
+        with self.lock:
+            if callback:
+                self.callbacks.append(callback)
+
+            if self.active:
+                return
+
+            if symbols is None:
+                symbols = self.get_symbols()
+            self.active = True
+            self.pending = deque(symbols)
+            self.inflight = 0
+            self.succeeded = []
+            self.reported = set()
+            self.start_time = datetime.now(CHINA_TZ)
+
+            batch: List[str] = [self.pending.popleft() for _ in range(min(RECONCILE_CONCURRENCY, len(symbols)))]
+            self.inflight = len(batch)
+
+        if not batch:
+            self.finish()
+            return
+
+        for symbol in batch:
+            self.query(symbol)
+
+    def query(self, symbol: str) -> None:
+        """查询单个合约的未成交委托"""
+        self.rest_api.add_request(
+            method="GET",
+            path="v1/trade/order/listUnfinished",
+            params={"symbol": symbol},
+            callback=self.on_query_order,
+            data={"security": Security.SIGNED},
+            on_failed=self.on_query_order_failed,
+            on_error=self.on_query_order_error,
+            extra=symbol
+        )
+
+    def on_query_order(self, data: dict, request: Request) -> None:
+        """未成交委托查询回报"""
+        if data.get('code') != 0:
+            self.gateway.write_log(f"委托信息查询失败，{request.extra}：{data}")
+            self.on_query_finished()
+            return
+
+        for d in data['data']:
+            with self.lock:
+                self.reported.add(d['clientOrderId'])
+            self.process_row(d)
+
+        with self.lock:
+            self.succeeded.append(request.extra)
+        self.on_query_finished()
+
+    def process_row(self, d: dict) -> None:
+        """处理单条委托查询数据，与本地委托比较后推送变化和漏掉的成交"""
+        if d['orderType'] not in ORDERTYPE_XEX2VT.keys():
+            return
+
+        orderid: str = d['clientOrderId']
+        status: Status = STATUS_XEX2VT.get(d['state'], None)
+        price: float = float(d["price"])
+        volume: float = float(d['origQty'])
+        traded: float = float(d['executedQty'])
+        avg_price: float = float(d.get("avgPrice", 0))
+
+        record: OrderRecord = self.gateway.order_store.get(orderid)
+        # 已结束的委托不会再变化，成交量回退的数据早于推送，均为过期数据
+        if record and (not record.is_active() or traded < record.traded):
+            return
+
+        # 与本地委托一致时不推送
+        if (
+            record
+            and record.status == status
+            and record.traded == traded
+            and record.price == price
+            and record.volume == volume
+        ):
+            return
+
+        order: OrderData = OrderData(
+            orderid=orderid,
+            symbol=d['symbol'],
+            exchange=Exchange.XEX,
+            price=price,
+            volume=volume,
+            type=ORDERTYPE_XEX2VT[d['orderType']],
+            direction=DIRECTION_XEX2VT[d['orderSide']],
+            offset=record.offset if record else Offset.NONE,
+            traded=traded,
+            status=status,
+            datetime=generate_datetime(d['createdTime']),
+            gateway_name=self.gateway_name,
+        )
+        setattr(order, "origin_orderId", d['orderId'])
+        setattr(order, "avg_price", avg_price)
+
+        # 断线期间漏掉的成交在此补齐，成交编号与推送一致，不会重复
+        change: Optional[OrderChange] = self.gateway.on_order(order)
+        if change:
+            self.gateway.process_fill(order, change)
+
+    def on_query_order_failed(self, status_code: int, request: Request) -> None:
+        """未成交委托查询失败回报"""
+        self.gateway.write_log(f"委托信息查询失败，{request.extra}，状态码：{status_code}")
+        self.on_query_finished()
+
+    def on_query_order_error(
+            self, exception_type: type, exception_value: Exception, tb: TracebackType, request: Request
+    ) -> None:
+        """未成交委托查询异常回报"""
+        self.on_query_finished()
+
+        if not issubclass(exception_type, (ConnectionError, SSLError)):
+            self.rest_api.on_error(exception_type, exception_value, tb, request)
+
+    def on_query_finished(self) -> None:
+        """单个合约查询结束，继续查询下一个合约"""
+        with self.lock:
+            if self.pending:
+                symbol: str = self.pending.popleft()
+            else:
+                symbol = None
+                self.inflight -= 1
+                finished: bool = self.inflight == 0
+
+        if symbol:
+            self.query(symbol)
+        elif finished:
+            self.finish()
+
+    def finish(self) -> None:
+        """未成交委托查询结束，本地活动委托在交易所已不在未完成列表中时查询其最终状态"""
+        order_store: OrderStore = self.gateway.order_store
+
+        with self.lock:
+            succeeded: List[str] = self.succeeded
+            reported: set = self.reported
+            start_time: datetime = self.start_time
+
+        missing: List[OrderRecord] = []
+        for symbol in succeeded:
+            for record in order_store.get_active_records(symbol):
+                # 跳过提交中以及对账开始后才发出的委托
+                if (
+                    record.orderid in reported
+                    or record.status == Status.SUBMITTING
+                    or (record.datetime and record.datetime >= start_time)
+                ):
+                    continue
+                missing.append(record)
+
+        with self.lock:
+            self.symbol_count = len(succeeded)
+            self.detail_pending = len(missing)
+
+        if not missing:
+            self.complete()
+            return
+
+        for record in missing:
+            self.query_detail(record.orderid)
+
+    def query_detail(self, orderid: str) -> None:
+        """查询单个委托的最终状态"""
+        self.rest_api.add_request(
+            method="GET",
+            path="v1/trade/order/detail",
+            params={"clientOrderId": orderid},
+            callback=self.on_query_detail,
+            data={"security": Security.SIGNED},
+            on_failed=self.on_query_detail_failed,
+            on_error=self.on_query_detail_error,
+            extra=orderid
+        )
+
+    def on_query_detail(self, data: dict, request: Request) -> None:
+        """委托状态查询回报，成交可能发生在断线期间，按查询结果补齐"""
+        if data.get('code') != 0 or not data.get('data'):
+            self.gateway.write_log(f"委托状态查询失败，保持本地状态，{request.extra}：{data}")
+        else:
+            self.process_row(data['data'])
+        self.on_detail_finished()
+
+    def on_query_detail_failed(self, status_code: int, request: Request) -> None:
+        """委托状态查询失败回报"""
+        self.gateway.write_log(f"委托状态查询失败，保持本地状态，{request.extra}，状态码：{status_code}")
+        self.on_detail_finished()
+
+    def on_query_detail_error(
+            self, exception_type: type, exception_value: Exception, tb: TracebackType, request: Request
+    ) -> None:
+        """委托状态查询异常回报"""
+        self.gateway.write_log(f"委托状态查询失败，保持本地状态，{request.extra}，异常：{exception_value!r}")
+        self.on_detail_finished()
+
+    def on_detail_finished(self) -> None:
+        """单个委托状态查询结束"""
+        with self.lock:
+            self.detail_pending -= 1
+            finished: bool = self.detail_pending == 0
+
+        if finished:
+            self.complete()
+
+    def complete(self) -> None:
+        """对账完成，执行完成回调"""
+        with self.lock:
+            self.active = False
+            callbacks, self.callbacks = self.callbacks, []
+
+        self.gateway.write_log(f"委托信息对账完成，合约数量：{self.symbol_count}")
+        for callback in callbacks:
+            callback()
+
+
 class XEXWebsocketClient(WebsocketClient):
+    def __init__(self) -> None:
+        """构造函数"""
+        super().__init__()
+
+        self.heart_beat_future: asyncio.Future = None
+        self.run_future: asyncio.Future = None
+
+        # 断线重连退避管理，connect_gap为本次连接前的断线时长
+        self.supervisor: ReconnectSupervisor = ReconnectSupervisor()
+        self.connect_gap: float = 0
+
+        # resType到推送处理函数的映射
+        self.packet_handlers: Dict[str, Callable[[dict], None]] = {}
+        # 纯文本控制帧到处理函数的映射
+        self.text_handlers: Dict[str, Callable[[], None]] = {}
+
+        # 收发数据录制
+        self.journal: Journal = None
+        self.journal_channel: int = CHANNEL_TRADE_WS
+
     def unpack_data(self, data: str):
         """
         对字符串数据进行json格式解包
 
-        如果需要使用json以外的解包格式，请重载实现本函数。
+        纯文本控制帧直接返回字符串，不经过json解析。
         """
+        if data in WEBSOCKET_TEXT_FRAMES or data[:1] not in ("{", "["):
+            return data
+
         try:
-            return json.loads(data)
-        except json.JSONDecodeError:
+            return json_loads(data)
+        except ValueError:
             return data
 
+    def on_packet(self, packet: Any) -> None:
+        """推送数据回报，按resType分发到对应处理函数"""
+        if isinstance(packet, dict):
+            handler: Callable[[dict], None] = self.packet_handlers.get(packet.get("resType"), None)
+            if handler:
+                handler(packet)
+        elif isinstance(packet, str):
+            handler: Callable[[], None] = self.text_handlers.get(packet, None)
+            if handler:
+                handler()
+
+    def get_loop(self) -> AbstractEventLoop:
+        """获取并启动客户端所在的事件循环，可供其他组件共享"""
+        if not self._loop or self._loop.is_closed():
+            self._loop = new_event_loop()
+
+        start_event_loop(self._loop)
+        return self._loop
+
+    def start(self):
+        """启动客户端，复用已有的事件循环，已在运行时不重复启动"""
+        self._active = True
+
+        if self.run_future and not self.run_future.done():
+            return
+        self.run_future = run_coroutine_threadsafe(self._run(), self.get_loop())
+
+    def stop(self):
+        """停止客户端，取消主协程和心跳，之后调用start会重新启动主协程"""
+        self._active = False
 
-class XEXSpotTradeWebsocketApi(XEXWebsocketClient):
-    """XEX现货交易Websocket API"""
+        if self.heart_beat_future:
+            self.heart_beat_future.cancel()
+            self.heart_beat_future = None
 
-    def __init__(self, gateway: XEXSpotGateway) -> None:
-        """构造函数"""
-        super().__init__()
+        # 事件循环随后会被停止，主协程可能停留在等待中，需要取消而不能等待其自行退出
+        if self.run_future:
+            self.run_future.cancel()
+            self.run_future = None
 
-        self.gateway: XEXSpotGateway = gateway
-        self.gateway_name = gateway.gateway_name
+        super().stop()
 
-        self.heart_beat_future: asyncio.Future = None
+    async def _run(self):
+        """在事件循环中运行的主协程，断线后按退避时间重连"""
+        session: ClientSession = ClientSession()
+        self._session = session
+        ws = None
 
-    def connect(self, url: str, proxy_host: str, proxy_port: int) -> None:
-        """连接Websocket交易频道"""
-        self.init(url, proxy_host, proxy_port)
-        self.start()
-        # 心跳发送
+        try:
+            while self._active:
+                try:
+                    ws = self._ws = await session.ws_connect(
+                        self._host,
+                        proxy=self._proxy,
+                        verify_ssl=False
+                    )
+
+                    self.connect_gap = self.supervisor.on_connected()
+                    self.on_connected()
+
+                    async for msg in ws:
+                        if msg.type != WSMsgType.TEXT:
+                            continue
+
+                        text: str = msg.data
+                        if self.journal:
+                            self.journal.append(self.journal_channel, text)
+                        self._record_last_received_text(text)
+                        self.on_packet(self.unpack_data(text))
+
+                    self._ws = ws = None
+                    self.on_disconnected()
+                except Exception:
+                    self._ws = ws = None
+                    et, ev, tb = sys.exc_info()
+                    self.on_error(et, ev, tb)
+
+                if self._active:
+                    self.supervisor.on_disconnected()
+                    await asyncio.sleep(self.supervisor.next_delay())
+        finally:
+            # 被取消时关闭本协程创建的连接，新启动的主协程使用各自的连接
+            if ws and not ws.closed:
+                await ws.close()
+            if self._ws is ws:
+                self._ws = None
+            await session.close()
+
+    def start_heart_beat(self) -> None:
+        """启动心跳发送"""
         if self.heart_beat_future: self.heart_beat_future.cancel()
         self.heart_beat_future = run_coroutine_threadsafe(self.heart_beat(), self._loop)
 
@@ -583,7 +1786,6 @@ class XEXSpotTradeWebsocketApi(XEXWebsocketClient):
             try:
                 if self._ws:
                     asyncio.create_task(self._ws.send_str("ping"))
-                    self.gateway.write_log("ping")
                     await asyncio.sleep(40)
                 else:
                     await asyncio.sleep(1)
@@ -592,9 +1794,55 @@ class XEXSpotTradeWebsocketApi(XEXWebsocketClient):
             except:
                 pass
 
+    def disconnect(self) -> None:
+        """"主动断开webscoket链接"""
+        self._active = False
+        ws = self._ws
+        if ws:
+            coro = ws.close()
+            run_coroutine_threadsafe(coro, self._loop)
+        if self.heart_beat_future:
+            self.heart_beat_future.cancel()
+
+
+class XEXSpotTradeWebsocketApi(XEXWebsocketClient):
+    """XEX现货交易Websocket API"""
+
+    def __init__(self, gateway: XEXSpotGateway) -> None:
+        """构造函数"""
+        super().__init__()
+
+        self.gateway: XEXSpotGateway = gateway
+        self.gateway_name = gateway.gateway_name
+
+        self.packet_handlers = {
+            "uBalance": self.on_account,
+            "uOrder": self.on_order,
+        }
+
+        # 最近一次断线时长，订阅成功后用于补齐数据
+        self.gap: float = 0
+
+        # 合约信息就绪前收到的委托推送
+        self.pending_orders: List[dict] = []
+        self.pending_lock: Lock = Lock()
+        self.text_handlers = {
+            "succeed": self.on_subscribed,
+            "invalid_ws_token": self.on_invalid_token,
+            "pong": self.on_pong,
+        }
+
+    def connect(self, url: str, proxy_host: str, proxy_port: int) -> None:
+        """连接Websocket交易频道"""
+        self.init(url, proxy_host, proxy_port)
+        self.start()
+        # 心跳发送
+        self.start_heart_beat()
+
     def on_connected(self) -> None:
         """连接成功回报"""
         self.gateway.write_log("交易Websocket API连接成功")
+        self.gap = self.connect_gap
         # 发送ws token
         self.gateway.rest_api.generate_ws_token(self.on_get_ws_token)
 
@@ -603,30 +1851,47 @@ class XEXSpotTradeWebsocketApi(XEXWebsocketClient):
         ws_token = data['data']
         self.send_packet({"sub": "subUser", "token": ws_token})
 
-    def on_packet(self, packet: Any) -> None:
-        """推送数据回报"""
-        if packet == 'succeed':
-            self.gateway.write_log("订阅账户成功")
-        elif packet == 'invalid_ws_token':
-            self.gateway.write_log("ws token过期或者无效，重新请求获取ws token并发送给ws服务端")
-            # 发送ws token
-            self.gateway.rest_api.generate_ws_token(self.on_get_ws_token)
-        elif packet == "pong":
-            self.gateway.write_log("pong")
-        elif isinstance(packet, dict) and packet.get("resType") == "uBalance":
-            self.on_account(packet)
-        elif isinstance(packet, dict) and packet.get("resType") == "uOrder":
-            self.on_order(packet)
+    def on_subscribed(self) -> None:
+        """订阅账户成功回报"""
+        self.gateway.write_log("订阅账户成功")
+        self.gateway.bootstrap.mark(PHASE_USER_STREAM)
 
-    def disconnect(self) -> None:
-        """"主动断开webscoket链接"""
-        self._active = False
-        ws = self._ws
-        if ws:
-            coro = ws.close()
-            run_coroutine_threadsafe(coro, self._loop)
-        if self.heart_beat_future:
-            self.heart_beat_future.cancel()
+        # 断线重连后补齐断线期间的委托和资金变化
+        if self.gap:
+            self.resync(self.gap)
+            self.gap = 0
+
+    def resync(self, gap: float) -> None:
+        """
+        重连后补齐断线期间的变化并刷新资金
+
+        断线期间只有本地活动委托可能发生变化（成交、撤销或断线前后发出的下单），
+        因此只对账有本地活动委托的合约，不按冻结资金扩展合约范围。
+        """
+        start: float = time.monotonic()
+        rest_api: XEXSpotRestAPi = self.gateway.rest_api
+        symbols: List[str] = [
+            symbol for symbol in self.gateway.order_store.get_active_symbols()
+            if symbol in symbol_contract_map
+        ]
+
+        def on_finished() -> None:
+            cost: float = time.monotonic() - start
+            self.supervisor.on_resync(cost, len(symbols))
+            self.gateway.write_log(f"断线{gap:.1f}秒，重连后对账完成，合约数量：{len(symbols)}，耗时{cost:.3f}秒")
+
+        rest_api.query_account()
+        rest_api.reconciler.start(on_finished, symbols)
+
+    def on_invalid_token(self) -> None:
+        """ws token无效回报"""
+        self.gateway.write_log("ws token过期或者无效，重新请求获取ws token并发送给ws服务端")
+        # 发送ws token
+        self.gateway.rest_api.generate_ws_token(self.on_get_ws_token)
+
+    def on_pong(self) -> None:
+        """心跳回报"""
+        self.gateway.write_log("pong")
 
     def on_account(self, packet: dict) -> None:
         """资金更新推送"""
@@ -664,6 +1929,26 @@ class XEXSpotTradeWebsocketApi(XEXWebsocketClient):
                           'symbol': 'LTC_USDT'},
                 'resType': 'uOrder'}
          """
+        # 合约信息就绪前先缓存推送
+        bootstrap: Bootstrap = self.gateway.bootstrap
+        if not bootstrap.is_ready(PHASE_CONTRACT):
+            with self.pending_lock:
+                if not bootstrap.is_ready(PHASE_CONTRACT):
+                    self.pending_orders.append(packet)
+                    return
+
+        self.process_order(packet)
+
+    def process_pending_orders(self) -> None:
+        """处理合约信息就绪前缓存的委托推送"""
+        with self.pending_lock:
+            packets, self.pending_orders = self.pending_orders, []
+
+        for packet in packets:
+            self.process_order(packet)
+
+    def process_order(self, packet: dict) -> None:
+        """处理委托推送"""
         data = packet['data']
         # 过滤不支持类型的委托 1:LIMIT 2:MARKET
         if data['orderType'] not in (1, 2):
@@ -673,7 +1958,8 @@ class XEXSpotTradeWebsocketApi(XEXWebsocketClient):
         if orderid is None:
             return
 
-        offset = self.gateway.get_order(orderid).offset if self.gateway.get_order(orderid) else None
+        record: OrderRecord = self.gateway.order_store.get(orderid)
+        offset = record.offset if record else None
         # vn order
         order: OrderData = OrderData(
             symbol=data["symbol"],
@@ -690,42 +1976,156 @@ class XEXSpotTradeWebsocketApi(XEXWebsocketClient):
             offset=offset
         )
         setattr(order, "origin_orderId", data['orderId'])
+        setattr(order, "avg_price", float(data["avgPrice"]))
 
-        order_last_snapshot = self.gateway.get_order(orderid)
+        # 成交量回退等过期推送不被存储接受，不再计算成交
+        change: Optional[OrderChange] = self.gateway.on_order(order)
+        if not change:
+            return
 
-        self.gateway.on_order(order)
         # 计算trade
-        if order_last_snapshot is not None and order.traded > order_last_snapshot.traded:
-            trade_volume = order.traded - order_last_snapshot.traded
-            contract: ContractData = symbol_contract_map.get(order.symbol, None)
-            if contract:
-                trade_volume = round_to(trade_volume, contract.min_volume)
+        self.gateway.process_fill(order, change)
 
-            if not trade_volume:
-                return
-
-            trade: TradeData = TradeData(
-                symbol=order.symbol,
-                exchange=order.exchange,
-                orderid=order.orderid,
-                tradeid="-1",
-                direction=order.direction,
-                price=0,
-                volume=trade_volume,
-                datetime=generate_datetime(data["createTime"]),
-                gateway_name=self.gateway_name,
-                offset=offset
-            )
-            self.gateway.on_trade(trade)
+        filled: bool = change.last_traded is not None and change.traded > change.last_traded
+        self.gateway.metrics.on_order(orderid, order.status, filled, order.is_active(), data["createTime"])
 
     def on_disconnected(self) -> None:
         """连接断开回报"""
         self.gateway.write_log("交易Websocket API断开")
-        self.gateway.rest_api.start_user_stream()
 
 
-def generate_datetime(timestamp: float) -> datetime:
-    """生成时间"""
-    dt: datetime = datetime.fromtimestamp(timestamp / 1000)
-    dt: datetime = CHINA_TZ.localize(dt)
-    return dt
+class XEXSpotDataWebsocketApi(XEXWebsocketClient):
+    """
+    XEX现货行情Websocket API
+
+    交易所未公开行情频道协议，订阅请求（subSymbol）和qDepth、qTrade推送格式
+    按账户推送的约定推断，接入实盘前需要核对。
+    """
+
+    def __init__(self, gateway: XEXSpotGateway) -> None:
+        """构造函数"""
+        super().__init__()
+
+        self.gateway: XEXSpotGateway = gateway
+        self.gateway_name: str = gateway.gateway_name
+
+        self.ticks: Dict[str, TickData] = {}
+        self.books: Dict[str, OrderBook] = {}
+
+        self.packet_handlers = {
+            "qDepth": self.on_depth,
+            "qTrade": self.on_trade,
+        }
+        self.journal_channel = CHANNEL_MARKET_WS
+
+    def connect(self, proxy_host: str, proxy_port: int) -> None:
+        """连接Websocket行情频道"""
+        self.init(WEBSOCKET_DATA_HOST, proxy_host, proxy_port)
+        self.start()
+        # 心跳发送
+        self.start_heart_beat()
+
+    def on_connected(self) -> None:
+        """连接成功回报"""
+        self.gateway.write_log("行情Websocket API连接成功")
+
+        # 重新订阅行情，并清空断线前的盘口
+        for symbol, book in self.books.items():
+            book.bids.clear()
+            book.asks.clear()
+            self._subscribe(symbol)
+
+    def on_disconnected(self) -> None:
+        """连接断开回报"""
+        self.gateway.write_log("行情Websocket API断开")
+
+    def subscribe(self, req: SubscribeRequest) -> None:
+        """订阅行情"""
+        if req.symbol in self.ticks:
+            return
+
+        contract: ContractData = symbol_contract_map.get(req.symbol, None)
+        if not contract:
+            self.gateway.write_log(f"找不到该合约代码{req.symbol}")
+            return
+
+        # 创建TickData对象和盘口
+        tick: TickData = TickData(
+            symbol=req.symbol,
+            name=contract.name,
+            exchange=Exchange.XEX,
+            datetime=datetime.now(CHINA_TZ),
+            gateway_name=self.gateway_name,
+        )
+        self.ticks[req.symbol] = tick
+        self.books[req.symbol] = OrderBook(req.symbol)
+
+        if self._ws:
+            self._subscribe(req.symbol)
+
+    def _subscribe(self, symbol: str) -> None:
+        """发送订阅请求"""
+        self.send_packet({"sub": "subSymbol", "symbol": symbol})
+
+    def on_depth(self, packet: dict) -> None:
+        """
+        盘口增量推送
+
+        data: {'s': 'btc_usdt', 't': 1685411494859, 'full': False,
+               'b': [['27000.1', '0.5']], 'a': [['27000.2', '0']]}
+        数量为0表示删除该档位，full为True表示全量快照
+        """
+        data: dict = packet["data"]
+        symbol: str = data["s"]
+        tick: TickData = self.ticks.get(symbol, None)
+        if not tick:
+            return
+
+        book: OrderBook = self.books[symbol]
+        book.apply(data.get("b", ()), data.get("a", ()), data.get("full", False))
+        book.fill_tick(tick)
+
+        timestamp = data.get("t", None)
+        tick.datetime = generate_datetime(timestamp) if timestamp else datetime.now(CHINA_TZ)
+        tick.localtime = datetime.now()
+
+        if timestamp:
+            self.gateway.metrics.on_market_data(symbol, timestamp)
+
+        if tick.last_price:
+            self.gateway.on_tick(copy(tick))
+
+    def on_trade(self, packet: dict) -> None:
+        """
+        逐笔成交推送
+
+        data: {'s': 'btc_usdt', 'p': '27000.1', 'a': '0.01', 't': 1685411494859}
+        """
+        data: dict = packet["data"]
+        tick: TickData = self.ticks.get(data["s"], None)
+        if not tick:
+            return
+
+        tick.last_price = float(data["p"])
+        tick.last_volume = float(data["a"])
+        tick.datetime = generate_datetime(data["t"])
+        tick.localtime = datetime.now()
+
+        self.gateway.on_tick(copy(tick))
+
+
+def parse_kline_rows(rows: List[dict]) -> np.ndarray:
+    """
+    将K线数据转换为列式数组
+
+    rows: [{'t': 1685411460000, 'o': '27000.1', 'h': '27001', 'l': '26999',
+            'c': '27000', 'v': '1.2', 'q': '32400.1'}]
+    """
+    return np.array(
+        [
+            (int(d["t"]), float(d["o"]), float(d["h"]), float(d["l"]),
+             float(d["c"]), float(d["v"]), float(d["q"]))
+            for d in rows
+        ],
+        dtype=BAR_DTYPE
+    )